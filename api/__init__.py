@@ -7,6 +7,7 @@ from fastapi import APIRouter
 from api import stock
 from api import prediction
 from api import portfolio
+from api import metrics
 
 # Create a router to include in the main app
 router = APIRouter()
@@ -0,0 +1,29 @@
+# api/metrics.py
+"""
+API endpoint exposing runtime instrumentation
+"""
+from fastapi import APIRouter
+from typing import Dict, Any
+
+from data.database import get_pool_stats, get_price_cache_stats
+from data.feature_store import get_feature_cache_stats
+from data.prediction_writer import get_prediction_writer_stats
+from ml.prediction import get_prediction_cache_stats
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/api/metrics")
+async def get_metrics() -> Dict[str, Any]:
+    """
+    Get connection pool, cache and prediction writer counters of this process
+    
+    Returns:
+        Dictionary with one section per component
+    """
+    return {
+        "db_pool": get_pool_stats(),
+        "price_cache": get_price_cache_stats(),
+        "feature_cache": get_feature_cache_stats(),
+        "prediction_cache": get_prediction_cache_stats(),
+        "prediction_writer": get_prediction_writer_stats()
+    }
@@ -2,18 +2,28 @@
 """
 API endpoints for portfolio simulation
 """
+import json
 from fastapi import APIRouter, HTTPException, Query
-from typing import Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta
 
-from services.portfolio import simulate_portfolio
-from config import AVAILABLE_SYMBOLS, DEFAULT_INITIAL_BALANCE, DEFAULT_SIMULATION_DAYS
+from services.portfolio import simulate_portfolio, simulate_multi_portfolio
+from services.sweep import run_sweep
+from services.compute import run_compute, ComputeSaturatedError, ComputeTimeoutError
+from data.async_database import save_portfolio_simulation
+from ml.features import FEATURE_WARMUP_ROWS
+from config import AVAILABLE_SYMBOLS, DEFAULT_INITIAL_BALANCE, DEFAULT_SIMULATION_DAYS, SWEEP_MAX_CELLS
 
 router = APIRouter(tags=["portfolio"])
 
+# Shortest simulation window with a simulated day left after the feature warm-up
+SIMULATION_MIN_DAYS = FEATURE_WARMUP_ROWS + 1
+
 @router.get("/api/portfolio/simulate")
 async def simulate(
     symbol: str,
-    days: int = Query(DEFAULT_SIMULATION_DAYS, ge=30, le=365),
+    days: int = Query(DEFAULT_SIMULATION_DAYS, ge=SIMULATION_MIN_DAYS, le=365),
     initial_balance: float = Query(DEFAULT_INITIAL_BALANCE, ge=1000, le=1000000)
 ) -> Dict[str, Any]:
     """
@@ -31,9 +41,140 @@ async def simulate(
     if symbol not in AVAILABLE_SYMBOLS:
         raise HTTPException(status_code=404, detail=f"Symbol {symbol} not supported")
     
-    # Run simulation
-    result = simulate_portfolio(symbol, days, initial_balance)
+    # Run simulation in the compute pool
+    try:
+        result = await run_compute(simulate_portfolio, symbol, days, initial_balance, save=False)
+    except ComputeSaturatedError:
+        raise HTTPException(
+            status_code=503, 
+            detail="Simulation capacity exhausted, try again shortly",
+            headers={"Retry-After": "5"}
+        )
+    except ComputeTimeoutError:
+        raise HTTPException(status_code=504, detail="Simulation timed out")
+    
+    if result is None:
+        raise HTTPException(status_code=500, detail="Simulation failed")
+    
+    # Save simulation results to database
+    await save_portfolio_simulation(
+        datetime.now() - timedelta(days=days),
+        datetime.now(),
+        initial_balance,
+        result["final_balance"],
+        result["roi_percentage"],
+        result["trades"]
+    )
+    
+    return result
+
+@router.get("/api/portfolio/simulate-multi")
+async def simulate_multi(
+    symbols: Optional[List[str]] = Query(None),
+    days: int = Query(DEFAULT_SIMULATION_DAYS, ge=SIMULATION_MIN_DAYS, le=365),
+    initial_balance: float = Query(DEFAULT_INITIAL_BALANCE, ge=1000, le=1000000)
+) -> Dict[str, Any]:
+    """
+    Run a portfolio simulation across several symbols
+    
+    Args:
+        symbols: Stock symbols (defaults to all available symbols)
+        days: Number of days to simulate
+        initial_balance: Initial portfolio balance, split equally between symbols
+        
+    Returns:
+        Combined and per-symbol simulation results
+    """
+    symbols = list(dict.fromkeys(symbols)) if symbols else list(AVAILABLE_SYMBOLS)
+    
+    # Check if symbols are valid
+    unsupported = [symbol for symbol in symbols if symbol not in AVAILABLE_SYMBOLS]
+    if unsupported:
+        raise HTTPException(status_code=404, detail=f"Symbols not supported: {', '.join(unsupported)}")
+    
+    # Run simulation in the compute pool
+    try:
+        result = await run_compute(simulate_multi_portfolio, symbols, days, initial_balance, save=False)
+    except ComputeSaturatedError:
+        raise HTTPException(
+            status_code=503, 
+            detail="Simulation capacity exhausted, try again shortly",
+            headers={"Retry-After": "5"}
+        )
+    except ComputeTimeoutError:
+        raise HTTPException(status_code=504, detail="Simulation timed out")
+    
     if result is None:
         raise HTTPException(status_code=500, detail="Simulation failed")
     
-    return result
\ No newline at end of file
+    # Save simulation results to database
+    await save_portfolio_simulation(
+        datetime.now() - timedelta(days=days),
+        datetime.now(),
+        initial_balance,
+        result["final_balance"],
+        result["roi_percentage"],
+        result["trades"],
+        strategy="ai_prediction_multi"
+    )
+    
+    return result
+
+@router.get("/api/portfolio/sweep")
+async def sweep(
+    symbol: str,
+    days: List[int] = Query([DEFAULT_SIMULATION_DAYS]),
+    initial_balance: List[float] = Query([DEFAULT_INITIAL_BALANCE]),
+    confidence_threshold: List[float] = Query([0.5])
+) -> StreamingResponse:
+    """
+    Run a portfolio simulation for every combination of the given parameters
+    
+    Args:
+        symbol: Stock symbol
+        days: Simulation lengths (50-365)
+        initial_balance: Initial balances (1000-1000000)
+        confidence_threshold: Minimum prediction confidences to trade on (0.5-1)
+        
+    Returns:
+        Newline-delimited JSON stream with one result per grid cell, ordered
+        by days and threshold
+    """
+    # Check if symbol is valid
+    if symbol not in AVAILABLE_SYMBOLS:
+        raise HTTPException(status_code=404, detail=f"Symbol {symbol} not supported")
+    
+    days = sorted(set(days))
+    initial_balance = list(dict.fromkeys(initial_balance))
+    confidence_threshold = list(dict.fromkeys(confidence_threshold))
+    
+    if any(d < SIMULATION_MIN_DAYS or d > 365 for d in days):
+        raise HTTPException(status_code=422, detail=f"days must be between {SIMULATION_MIN_DAYS} and 365")
+    if any(b < 1000 or b > 1000000 for b in initial_balance):
+        raise HTTPException(status_code=422, detail="initial_balance must be between 1000 and 1000000")
+    if any(t < 0.5 or t > 1 for t in confidence_threshold):
+        raise HTTPException(status_code=422, detail="confidence_threshold must be between 0.5 and 1")
+    if len(days) * len(initial_balance) * len(confidence_threshold) > SWEEP_MAX_CELLS:
+        raise HTTPException(status_code=422, detail=f"Sweep grid exceeds {SWEEP_MAX_CELLS} cells")
+    
+    # Fit the shared model and backtest the whole grid in one compute job,
+    # so a sweep holds a single slot like any other simulation
+    try:
+        cells = await run_compute(run_sweep, symbol, days, confidence_threshold, initial_balance)
+    except ComputeSaturatedError:
+        raise HTTPException(
+            status_code=503, 
+            detail="Simulation capacity exhausted, try again shortly",
+            headers={"Retry-After": "5"}
+        )
+    except ComputeTimeoutError:
+        raise HTTPException(status_code=504, detail="Simulation timed out")
+    
+    if not cells:
+        raise HTTPException(status_code=500, detail="Sweep failed")
+    
+    def stream_results():
+        for cell in cells:
+            yield json.dumps(cell) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
\ No newline at end of file
@@ -2,11 +2,15 @@
 """
 API endpoints for predictions
 """
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from typing import List, Dict, Any, Optional
 
-from ml.prediction import make_prediction
-from data.database import get_recent_predictions, get_prediction_history, update_actual_movements
+from ml.prediction import make_prediction, make_predictions
+from data.async_database import get_recent_predictions, get_prediction_history, get_prediction_history_signature
+from utils.http import make_etag, cache_headers, is_not_modified, not_modified_response, compressed_response
+from data.stock_data import dumps_json
+from data.database import update_actual_movements
 from config import AVAILABLE_SYMBOLS
 
 # Global variable from app.py
@@ -14,6 +18,46 @@ global_models = {}
 
 router = APIRouter(tags=["predictions"])
 
+@router.get("/api/predict")
+async def predict_stocks(symbols: Optional[List[str]] = Query(None)) -> Dict[str, Any]:
+    """
+    Get next-day predictions for several stocks in one call
+    
+    Args:
+        symbols: Stock symbols (defaults to all available symbols)
+        
+    Returns:
+        Predictions per symbol, plus an error message for each symbol that
+        could not be predicted
+    """
+    symbols = list(dict.fromkeys(symbols)) if symbols else list(AVAILABLE_SYMBOLS)
+    
+    # Check if symbols are valid
+    unsupported = [symbol for symbol in symbols if symbol not in AVAILABLE_SYMBOLS]
+    if unsupported:
+        raise HTTPException(status_code=404, detail=f"Symbols not supported: {', '.join(unsupported)}")
+    
+    # Import here to avoid circular imports
+    from app import global_models
+    
+    # Load, score and store all symbols together off the event loop
+    try:
+        results = await run_in_threadpool(make_predictions, global_models, symbols)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Prediction error: {str(e)}")
+    
+    predictions = {}
+    errors = {}
+    for symbol in symbols:
+        if results.get(symbol) is not None:
+            predictions[symbol] = results[symbol]
+        elif global_models.get(symbol) is None:
+            errors[symbol] = f"No model available for {symbol}"
+        else:
+            errors[symbol] = "Prediction failed"
+    
+    return {"predictions": predictions, "errors": errors}
+
 @router.get("/api/predict/{symbol}")
 async def predict_stock(symbol: str) -> Dict[str, Any]:
     """
@@ -30,9 +74,9 @@ async def predict_stock(symbol: str) -> Dict[str, Any]:
     if symbol not in global_models or global_models[symbol] is None:
         raise HTTPException(status_code=404, detail=f"No model available for {symbol}")
     
-    # Make prediction
+    # Make prediction (blocking data fetch and scoring run off the event loop)
     try:
-        result = make_prediction(global_models[symbol], symbol)
+        result = await run_in_threadpool(make_prediction, global_models[symbol], symbol)
         if result is None:
             raise HTTPException(status_code=500, detail="Prediction failed")
         
@@ -56,13 +100,14 @@ async def get_recent(symbol: str, limit: int = Query(5, ge=1, le=20)) -> List[Di
     if symbol not in AVAILABLE_SYMBOLS:
         raise HTTPException(status_code=404, detail=f"Symbol {symbol} not supported")
     
-    return get_recent_predictions(symbol, limit)
+    return await get_recent_predictions(symbol, limit)
 
 @router.get("/api/predictions/history")
 async def get_history(
+    request: Request,
     symbol: Optional[str] = None, 
     limit: int = Query(100, ge=1, le=500)
-) -> List[Dict[str, Any]]:
+) -> Response:
     """
     Get prediction history
     
@@ -76,7 +121,20 @@ async def get_history(
     if symbol is not None and symbol not in AVAILABLE_SYMBOLS:
         raise HTTPException(status_code=404, detail=f"Symbol {symbol} not supported")
     
-    return get_prediction_history(symbol, limit)
+    # New, replaced (newer prediction_date) and newly resolved predictions
+    # all change the signature
+    headers = {}
+    signature = await get_prediction_history_signature(symbol)
+    if signature is not None:
+        etag = make_etag(
+            symbol, limit, signature["latest_id"], signature["latest_date"], signature["unresolved"]
+        )
+        headers = cache_headers(etag)
+        if is_not_modified(request, etag):
+            return not_modified_response(headers)
+    
+    history = await get_prediction_history(symbol, limit)
+    return compressed_response(request, dumps_json(history), "application/json", headers=headers)
 
 @router.post("/api/update-actual-movement")
 async def update_movements() -> Dict[str, Any]:
@@ -86,5 +144,5 @@ async def update_movements() -> Dict[str, Any]:
     Returns:
         Number of predictions updated
     """
-    updated = update_actual_movements()
+    updated = await run_in_threadpool(update_actual_movements)
     return {"updated": updated}
\ No newline at end of file
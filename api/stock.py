@@ -2,25 +2,46 @@
 """
 API endpoints for stock data
 """
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 
-from data.stock_data import get_data, format_stock_data_for_api
+from data.stock_data import get_data, serialize_stock_data, serialize_stock_data_arrow
+from data.database import get_latest_stock_bar
+from utils.http import compressed_response, make_etag, cache_headers, is_not_modified, not_modified_response
+from config import STOCK_CACHE_MAX_AGE
 
 router = APIRouter(prefix="/api/stock", tags=["stock"])
 
+# Columns needed by format_stock_data_for_api
+API_COLUMNS = ["date", "open_price", "close_price", "high_price", "low_price", "volume"]
+
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
 @router.get("/{symbol}")
-async def get_stock_data(symbol: str, period: str = "3m") -> List[Dict[str, Any]]:
+async def get_stock_data(
+    request: Request,
+    symbol: str, 
+    period: str = "3m",
+    response_format: str = Query("rows", alias="format")
+) -> Response:
     """
     Get historical stock data
     
     Args:
         symbol: Stock symbol
         period: Time period (1m, 3m, 6m, 1y)
+        format: "rows" (list of data points), "columnar" (parallel arrays) or
+            "arrow" (Arrow IPC stream); an Accept header of
+            application/vnd.apache.arrow.stream also selects Arrow
         
     Returns:
-        List of stock data points
+        Stock data points in the requested layout
     """
+    if ARROW_MEDIA_TYPE in request.headers.get("accept", ""):
+        response_format = "arrow"
+    if response_format not in ("rows", "columnar", "arrow"):
+        raise HTTPException(status_code=422, detail="format must be one of rows, columnar, arrow")
+    
     # Map period to days
     period_days = {
         "1m": 30,
@@ -31,10 +52,29 @@ async def get_stock_data(symbol: str, period: str = "3m") -> List[Dict[str, Any]
     
     days = period_days.get(period, 90)
     
-    # Get data
-    df = get_data(symbol, period=period)
+    # Stored bars only change when new ones are fetched, so the latest bar
+    # identifies this response
+    headers = {}
+    latest_bar = await run_in_threadpool(get_latest_stock_bar, symbol)
+    if latest_bar is not None:
+        etag = make_etag(symbol, days, response_format, *latest_bar)
+        headers = cache_headers(etag, STOCK_CACHE_MAX_AGE)
+        if is_not_modified(request, etag):
+            return not_modified_response(headers)
+    
+    # Get only the rows and columns the response needs
+    df = await run_in_threadpool(get_data, symbol, period=period, limit=days, columns=API_COLUMNS)
     if df is None:
         raise HTTPException(status_code=404, detail=f"No data found for symbol {symbol}")
     
-    # Format for API response
-    return format_stock_data_for_api(df, days)
\ No newline at end of file
+    # Format and encode for API response in one pass
+    if response_format == "arrow":
+        body = serialize_stock_data_arrow(df, days)
+        if body is None:
+            raise HTTPException(status_code=406, detail="Arrow format is not available on this server")
+        media_type = ARROW_MEDIA_TYPE
+    else:
+        body = serialize_stock_data(df, days, layout=response_format)
+        media_type = "application/json"
+    
+    return compressed_response(request, body, media_type, vary="Accept", headers=headers)
\ No newline at end of file
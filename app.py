@@ -16,13 +16,17 @@ from api.stock import get_stock_data
 from api.portfolio import simulate
 from api.prediction import predict_stock, get_recent, get_history, update_movements
 
-from data.database import create_tables
+from data.database import create_tables, close_pool
+from data.prediction_writer import close_prediction_writer
+from data.async_database import close_async_pool
 from data.stock_data import fetch_stock_data
 from ml.training import train_model
+from services.compute import run_compute_sync, shutdown_compute
 
 from api.stock import router as stock_router
 from api.prediction import router as prediction_router
 from api.portfolio import router as portfolio_router
+from api.metrics import router as metrics_router
 
 global_models = {}
 
@@ -37,6 +41,7 @@ os.makedirs("templates", exist_ok=True)
 app.include_router(stock_router)
 app.include_router(prediction_router)
 app.include_router(portfolio_router)
+app.include_router(metrics_router)
 
 from config import (
     AVAILABLE_SYMBOLS, INITIAL_SYMBOLS, MODEL_UPDATE_INTERVAL, 
@@ -100,7 +105,11 @@ def update_models_task():
     while True:
         for symbol in AVAILABLE_SYMBOLS:
             fetch_stock_data(symbol)
-            global_models[symbol] = train_model(symbol)
+            try:
+                # Train in the compute pool to keep the web worker responsive
+                global_models[symbol] = run_compute_sync(train_model, symbol)
+            except Exception as e:
+                print(f"Error training model for {symbol}: {e}")
         
         # Sleep for the configured interval
         time.sleep(MODEL_UPDATE_INTERVAL)
@@ -128,9 +137,9 @@ def startup_event():
         else:
             print("ERROR: Template file was not created: templates/index.html")
         
-        # Create database tables
+        # Apply pending schema migrations (stored prices and predictions are kept)
         if create_tables():
-            # Fetch data and train models for initial symbols
+            # Fetch missing bars and train models for initial symbols
             for symbol in INITIAL_SYMBOLS:
                 print(f"Initializing data and model for {symbol}...")
                 try:
@@ -146,6 +155,17 @@ def startup_event():
     except Exception as e:
         print(f"Error during startup: {e}")
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """
+    Shutdown event handler that releases pooled database connections
+    """
+    # Write queued predictions while the connection pool is still open
+    close_prediction_writer(timeout=10)
+    shutdown_compute()
+    await close_async_pool()
+    close_pool()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host=API_HOST, port=API_PORT)
\ No newline at end of file
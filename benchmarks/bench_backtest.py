@@ -0,0 +1,100 @@
+# benchmarks/bench_backtest.py
+"""
+Day-by-day simulation loop vs the vectorized backtest engine
+
+Checks that both produce identical trades and equity curves and times them
+over 1-10 years of synthetic daily data. Run from the repository root:
+
+    python -m benchmarks.bench_backtest
+"""
+import time
+
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+from benchmarks.synthetic import make_price_frame
+from ml.features import add_features, get_feature_list
+from services.backtest import run_backtest, format_dates
+
+YEARS = [1, 2, 5, 10]
+TRADING_DAYS = 252
+
+def legacy_loop(model, df, features, initial_balance):
+    """The simulation loop previously used by simulate_portfolio"""
+    balance = initial_balance
+    shares = 0
+    trades = []
+    daily_balance = []
+    
+    def fmt(d):
+        return d.strftime("%Y-%m-%d") if isinstance(d, pd.Timestamp) else str(d)
+    
+    for i in range(len(df) - 1):
+        current_data = df.iloc[i]
+        features_array = current_data[features].values.reshape(1, -1)
+        prediction = model.predict(features_array)[0]
+        confidence = model.predict_proba(features_array)[0][prediction]
+        
+        if prediction == 1 and shares == 0:
+            shares = balance / current_data["close_price"]
+            trade_cost = shares * current_data["close_price"]
+            balance = 0
+            trades.append({"date": fmt(current_data["date"]), "action": "BUY",
+                           "price": float(current_data["close_price"]), "shares": float(shares),
+                           "value": float(trade_cost), "confidence": float(confidence)})
+        elif prediction == 0 and shares > 0:
+            trade_value = shares * current_data["close_price"]
+            balance = trade_value
+            trades.append({"date": fmt(current_data["date"]), "action": "SELL",
+                           "price": float(current_data["close_price"]), "shares": float(shares),
+                           "value": float(trade_value), "confidence": float(confidence)})
+            shares = 0
+        
+        total_value = balance + (shares * current_data["close_price"])
+        daily_balance.append({"date": fmt(current_data["date"]), "balance": float(total_value),
+                              "shares": float(shares), "price": float(current_data["close_price"])})
+    
+    final_day = df.iloc[-1]
+    final_balance = balance + (shares * final_day["close_price"])
+    if shares > 0:
+        trades.append({"date": fmt(final_day["date"]), "action": "FINAL SELL",
+                       "price": float(final_day["close_price"]), "shares": float(shares),
+                       "value": float(shares * final_day["close_price"]), "confidence": 1.0})
+    daily_balance.append({"date": fmt(final_day["date"]), "balance": float(final_balance),
+                          "shares": float(shares), "price": float(final_day["close_price"])})
+    return trades, daily_balance, final_balance
+
+def vectorized(model, df, features, initial_balance):
+    probabilities = model.predict_proba(df[features])
+    result = run_backtest(
+        format_dates(df["date"]), df["close_price"].to_numpy(dtype=np.float64),
+        probabilities, initial_balance
+    )
+    return result["trades"], result["daily_balance"], result["final_balance"]
+
+def main():
+    features = get_feature_list()
+    train = add_features(make_price_frame(2 * TRADING_DAYS, seed=1))
+    train["target"] = (train["close_price"].shift(-1) > train["close_price"]).astype(int)
+    train = train.dropna()
+    model = xgb.XGBClassifier(random_state=42)
+    model.fit(train[features], train["target"])
+    
+    print(f"{'years':>5} {'days':>6} {'loop ms':>10} {'vectorized ms':>14} {'speedup':>8} identical")
+    for years in YEARS:
+        df = add_features(make_price_frame(years * TRADING_DAYS, seed=years)).dropna()
+        
+        start = time.perf_counter()
+        expected = legacy_loop(model, df, features, 10000)
+        loop_seconds = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        actual = vectorized(model, df, features, 10000)
+        vector_seconds = time.perf_counter() - start
+        
+        print(f"{years:>5} {len(df):>6} {loop_seconds * 1000:>10.1f} {vector_seconds * 1000:>14.2f} "
+              f"{loop_seconds / vector_seconds:>7.0f}x {actual == expected}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_features.py
+"""
+Cost of bringing a symbol's features up to date after a daily fetch
+
+The fetch rewrites the latest stored bar and appends a new one. Three ways
+of producing the updated feature frame are checked against add_features over
+the whole history and timed:
+
+- full: add_features over the whole history
+- reload: what a cold read of the feature store does, expanding the stored
+  feature arrays of every bar and extending them from a rebuilt engine
+- kept state: refresh_features continuing the rolling state kept with the
+  cached frame (append_bars), which is what a daily update now runs
+
+Database reads are not included; the reload path additionally reads the
+full history while the kept-state path reads only the new bars. Run from the
+repository root:
+
+    python -m benchmarks.bench_features
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import make_price_frame
+from data.feature_store import _with_stored_features, append_bars
+from ml.features import ENGINEERED_FEATURES, add_features
+from ml.incremental_features import IncrementalFeatureEngine, extend_features
+
+YEARS = [2, 5, 10]
+TRADING_DAYS = 252
+REPEATS = 20
+
+def max_abs_diff(expected: np.ndarray, actual: np.ndarray) -> float:
+    """Largest absolute difference, requiring NaNs in the same places"""
+    if not np.array_equal(np.isnan(expected), np.isnan(actual)):
+        return float("inf")
+    mask = ~np.isnan(expected)
+    return float(np.max(np.abs(expected[mask] - actual[mask]), initial=0.0))
+
+def time_per_call(fn) -> float:
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        fn()
+    return (time.perf_counter() - start) / REPEATS
+
+def main():
+    print(f"{'years':>5} {'bars':>6} {'max abs diff':>13} {'full ms':>9} {'reload ms':>10} "
+          f"{'kept state ms':>14} {'speedup':>8}")
+    for years in YEARS:
+        df = make_price_frame(years * TRADING_DAYS, seed=years)
+        expected = add_features(df)[ENGINEERED_FEATURES].to_numpy(dtype=float)
+        
+        # State before the fetch: every bar but the new one, with the last of
+        # them about to be rewritten
+        known = add_features(df.iloc[:-1])
+        stored = pd.Series(list(known[ENGINEERED_FEATURES].to_numpy(dtype=float).tolist()))
+        prices = df.iloc[:-2].reset_index(drop=True)
+        engine = IncrementalFeatureEngine.from_history(known.iloc[:-1])
+        new_bars = df.iloc[-2:].reset_index(drop=True)
+        
+        def reload():
+            history = _with_stored_features(prices, stored.iloc[:-1])
+            return pd.concat([history, extend_features(history, new_bars)], ignore_index=True)
+        
+        def kept_state():
+            return append_bars(known, engine, new_bars)[0]
+        
+        diff = max(
+            max_abs_diff(expected, reload()[ENGINEERED_FEATURES].to_numpy(dtype=float)),
+            max_abs_diff(expected, kept_state()[ENGINEERED_FEATURES].to_numpy(dtype=float))
+        )
+        
+        full_seconds = time_per_call(lambda: add_features(df))
+        reload_seconds = time_per_call(reload)
+        kept_seconds = time_per_call(kept_state)
+        
+        print(f"{years:>5} {len(df):>6} {diff:>13.2e} {full_seconds * 1000:>9.2f} "
+              f"{reload_seconds * 1000:>10.2f} {kept_seconds * 1000:>14.3f} "
+              f"{full_seconds / kept_seconds:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# benchmarks/bench_ingest.py
+"""
+Ingestion throughput for stock_prices: per-row INSERT vs the bulk writer
+
+Requires a reachable database (see config.py). Run from the repository root:
+
+    python -m benchmarks.bench_ingest
+"""
+import time
+
+from benchmarks.synthetic import make_history
+from data.database import connect_db, create_tables, write_stock_prices
+
+SYMBOL = "BENCH"
+SIZES = [500, 5000, 50000]
+
+def insert_row_by_row(conn, symbol, df):
+    """The previous ingestion loop: one INSERT per row"""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM stock_prices WHERE symbol = %s", (symbol,))
+    for _, row in df.iterrows():
+        cursor.execute(
+            """INSERT INTO stock_prices 
+               (symbol, date, open_price, close_price, high_price, low_price, volume, adjusted_close) 
+               VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
+            (symbol, row["Date"], row["Open"], row["Close"],
+             row["High"], row["Low"], int(row["Volume"]), row["Close"])
+        )
+    conn.commit()
+
+def insert_bulk(conn, symbol, df):
+    """The bulk writer, starting from an empty symbol like the loop above"""
+    cursor = conn.cursor()
+    cursor.execute("DELETE FROM stock_prices WHERE symbol = %s", (symbol,))
+    write_stock_prices(conn, symbol, df)
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    fn(*args)
+    return time.perf_counter() - start
+
+def main():
+    if not create_tables():
+        print("Database not available")
+        return
+    
+    conn = connect_db()
+    try:
+        print(f"{'rows':>8} {'row-by-row rows/s':>20} {'bulk rows/s':>14} {'speedup':>8}")
+        for n in SIZES:
+            df = make_history(n)
+            legacy = timed(insert_row_by_row, conn, SYMBOL, df)
+            bulk = timed(insert_bulk, conn, SYMBOL, df)
+            print(f"{n:>8} {n / legacy:>20,.0f} {n / bulk:>14,.0f} {legacy / bulk:>7.1f}x")
+        
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM stock_prices WHERE symbol = %s", (SYMBOL,))
+        conn.commit()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    main()
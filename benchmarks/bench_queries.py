@@ -0,0 +1,115 @@
+# benchmarks/bench_queries.py
+"""
+Query plans and timings for the stock_prices / prediction_history read paths
+
+Builds the application schema in a scratch PostgreSQL schema, fills it with
+synthetic rows and runs EXPLAIN ANALYZE for each query the app issues, so
+index usage can be checked as the tables grow. Run from the repository root:
+
+    python -m benchmarks.bench_queries [rows ...]
+"""
+import json
+import sys
+
+from data.database import connect_db
+from data.migrations import apply_migrations
+
+SCHEMA = "bench_queries"
+DEFAULT_SIZES = [100_000, 1_000_000]
+N_SYMBOLS = 500
+
+QUERIES = {
+    "stock history": (
+        "SELECT * FROM stock_prices WHERE symbol = 'S0042' ORDER BY date",
+        "stock_prices_symbol_date_key"
+    ),
+    "latest bar": (
+        "SELECT MAX(date) FROM stock_prices WHERE symbol = 'S0042'",
+        "stock_prices_symbol_date_key"
+    ),
+    "recent predictions": (
+        """SELECT id, symbol, prediction_date, predicted_movement, confidence, actual_movement
+           FROM prediction_history WHERE symbol = 'S0042'
+           ORDER BY prediction_date DESC LIMIT 5""",
+        "idx_prediction_history_symbol_date"
+    ),
+    "prediction history": (
+        """SELECT id, symbol, prediction_date, predicted_movement, confidence, actual_movement
+           FROM prediction_history ORDER BY prediction_date DESC LIMIT 100""",
+        "idx_prediction_history_date"
+    ),
+    "unresolved predictions": (
+        """SELECT id, symbol, prediction_date FROM prediction_history
+           WHERE actual_movement IS NULL AND prediction_date < now() - interval '1 day'""",
+        "idx_prediction_history_unresolved"
+    )
+}
+
+def populate(cursor, rows: int) -> None:
+    days = rows // N_SYMBOLS
+    cursor.execute("TRUNCATE stock_prices, prediction_history")
+    cursor.execute(
+        """INSERT INTO stock_prices
+           (symbol, date, open_price, close_price, high_price, low_price, volume, adjusted_close)
+           SELECT 'S' || lpad(s::text, 4, '0'), timestamp '2000-01-01' + d * interval '1 day',
+                  100 + random(), 100 + random(), 101 + random(), 99 + random(),
+                  (random() * 1e7)::int, 100 + random()
+           FROM generate_series(0, %s - 1) s, generate_series(0, %s - 1) d""",
+        (N_SYMBOLS, days)
+    )
+    # Roughly 1% of predictions are still waiting for their actual movement
+    cursor.execute(
+        """INSERT INTO prediction_history
+           (symbol, prediction_date, predicted_movement, confidence, actual_movement)
+           SELECT 'S' || lpad(s::text, 4, '0'), now() - d * interval '1 day',
+                  random() > 0.5, 0.5 + random() / 2,
+                  CASE WHEN d > %s * 0.99 THEN NULL ELSE random() > 0.5 END
+           FROM generate_series(0, %s - 1) s, generate_series(0, %s - 1) d""",
+        (days, N_SYMBOLS, days)
+    )
+    cursor.execute("ANALYZE stock_prices")
+    cursor.execute("ANALYZE prediction_history")
+
+def index_names(plan: dict) -> set:
+    names = {plan["Index Name"]} if "Index Name" in plan else set()
+    for child in plan.get("Plans", []):
+        names |= index_names(child)
+    return names
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or DEFAULT_SIZES
+    
+    conn = connect_db()
+    if conn is None:
+        print("Database not available")
+        return
+    
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {SCHEMA}")
+        cursor.execute(f"SET search_path TO {SCHEMA}")
+        apply_migrations(conn)
+        
+        for rows in sizes:
+            populate(cursor, rows)
+            conn.commit()
+            print(f"\n{rows:,} rows per table")
+            for name, (query, expected_index) in QUERIES.items():
+                cursor.execute(f"EXPLAIN (ANALYZE, FORMAT JSON) {query}")
+                result = cursor.fetchone()[0]
+                if isinstance(result, str):
+                    result = json.loads(result)
+                plan = result[0]
+                used = index_names(plan["Plan"])
+                status = "ok" if expected_index in used else "MISSING " + expected_index
+                print(f"  {name:<24} {plan['Execution Time']:>9.2f} ms  "
+                      f"{plan['Plan']['Node Type']:<22} {status}")
+    finally:
+        conn.rollback()
+        cursor.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        conn.commit()
+        conn.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# benchmarks/bench_scoring.py
+"""
+Per-prediction latency: predict + predict_proba vs ModelScorer
+
+Scores the latest feature rows of a synthetic history one at a time, the way
+make_prediction does, and checks that both paths agree on every movement and
+confidence. Run from the repository root:
+
+    python -m benchmarks.bench_scoring
+"""
+import time
+
+import numpy as np
+import xgboost as xgb
+
+from benchmarks.synthetic import make_price_frame
+from ml.features import get_feature_list, prepare_training_data
+from ml.scoring import ModelScorer
+from config import MODEL_PARAMS
+
+TRADING_DAYS = 252
+ROWS = 500
+
+def legacy_score(model, features, latest):
+    """The scoring code previously used by make_prediction"""
+    features_array = np.array([latest[f] for f in features]).reshape(1, -1)
+    prediction = bool(model.predict(features_array)[0])
+    confidence = float(model.predict_proba(features_array)[0][int(prediction)])
+    return prediction, confidence
+
+def main():
+    df, features = prepare_training_data(make_price_frame(2 * TRADING_DAYS, seed=1))
+    model = xgb.XGBClassifier(**MODEL_PARAMS)
+    model.fit(df[features], df["target"])
+    
+    rows = prepare_training_data(make_price_frame(ROWS + 60, seed=2))[0].tail(ROWS)
+    rows = rows[get_feature_list()].to_dict("records")
+    scorer = ModelScorer(model, features)
+    
+    start = time.perf_counter()
+    expected = [legacy_score(model, features, latest) for latest in rows]
+    legacy_seconds = (time.perf_counter() - start) / len(rows)
+    
+    start = time.perf_counter()
+    actual = [scorer.score(latest) for latest in rows]
+    scorer_seconds = (time.perf_counter() - start) / len(rows)
+    
+    print(f"{'path':>22} {'us/prediction':>14}")
+    print(f"{'predict+predict_proba':>22} {legacy_seconds * 1e6:>14.1f}")
+    print(f"{'ModelScorer':>22} {scorer_seconds * 1e6:>14.1f}")
+    print(f"speedup {legacy_seconds / scorer_seconds:.1f}x, identical: {actual == expected}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+# benchmarks/bench_serialization.py
+"""
+Latency of the /api/stock/{symbol} response body: row-by-row formatting with
+json.dumps vs the columnar formatter with the fast encoder
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serialization
+"""
+import json
+import timeit
+
+import pandas as pd
+
+from benchmarks.synthetic import make_price_frame
+from data.stock_data import serialize_stock_data
+
+SIZES = [90, 365, 5000]
+HISTORY_DAYS = 6000
+
+def legacy_serialize(df, days):
+    """The previous format_stock_data_for_api plus a stdlib JSON encode"""
+    data = []
+    for _, row in df.iterrows():
+        item = {
+            "date": row["date"].strftime("%Y-%m-%d") if isinstance(row["date"], pd.Timestamp) else str(row["date"]),
+            "open_price": float(row["open_price"]) if "open_price" in row else 0.0,
+            "close_price": float(row["close_price"]) if "close_price" in row else 0.0,
+            "volume": int(row["volume"]) if "volume" in row else 0
+        }
+        item["high_price"] = float(row["high_price"]) if "high_price" in row else item["close_price"]
+        item["low_price"] = float(row["low_price"]) if "low_price" in row else item["close_price"]
+        data.append(item)
+    return json.dumps(data[-days:]).encode("utf-8")
+
+def main():
+    history = make_price_frame(HISTORY_DAYS)
+    
+    print(f"{'rows':>6} {'legacy (full frame) ms':>23} {'legacy (sliced) ms':>19} {'columnar ms':>12} {'same':>5}")
+    for days in SIZES:
+        sliced = history.tail(days)
+        same = json.loads(legacy_serialize(sliced, days)) == json.loads(serialize_stock_data(sliced, days))
+        
+        number = 5 if days > 1000 else 20
+        full = min(timeit.repeat(lambda: legacy_serialize(history, days), number=1, repeat=3))
+        legacy = min(timeit.repeat(lambda: legacy_serialize(sliced, days), number=number, repeat=3)) / number
+        columnar = min(timeit.repeat(lambda: serialize_stock_data(history, days), number=number, repeat=3)) / number
+        print(f"{days:>6} {full * 1000:>23.2f} {legacy * 1000:>19.2f} {columnar * 1000:>12.3f} {str(same):>5}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+# benchmarks/synthetic.py
+"""
+Synthetic market data for benchmarks, so they run without network access
+"""
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+def make_history(n_days: int, seed: int = 42, start: str = "2015-01-02") -> pd.DataFrame:
+    """
+    Build a yfinance-style daily history (Date, Open, High, Low, Close, Volume)
+    
+    Args:
+        n_days: Number of trading days
+        seed: Random seed
+        start: First trading date
+        
+    Returns:
+        DataFrame shaped like yf.Ticker(...).history(...).reset_index()
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start=start, periods=n_days)
+    close = 100 * np.exp(np.cumsum(rng.normal(0.0003, 0.015, n_days)))
+    open_ = close * (1 + rng.normal(0, 0.005, n_days))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.004, n_days)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.004, n_days)))
+    volume = rng.integers(1_000_000, 50_000_000, n_days)
+    
+    return pd.DataFrame({
+        "Date": dates,
+        "Open": open_,
+        "High": high,
+        "Low": low,
+        "Close": close,
+        "Volume": volume
+    })
+
+def make_price_frame(n_days: int, symbol: str = "TEST", seed: int = 42) -> pd.DataFrame:
+    """
+    Build a frame with the stock_prices column layout returned by get_data
+    """
+    raw = make_history(n_days, seed)
+    return pd.DataFrame({
+        "id": np.arange(1, n_days + 1),
+        "symbol": symbol,
+        "date": raw["Date"],
+        "open_price": raw["Open"],
+        "close_price": raw["Close"],
+        "high_price": raw["High"],
+        "low_price": raw["Low"],
+        "volume": raw["Volume"],
+        "adjusted_close": raw["Close"]
+    })
+
+def write_market_data_dir(directory: str, symbols: List[str], n_days: int = 504) -> None:
+    """
+    Write one CSV per symbol for LocalFileProvider
+    
+    Point the app at it with MARKET_DATA_PROVIDER=local MARKET_DATA_DIR=<directory>
+    to run without network access.
+    """
+    os.makedirs(directory, exist_ok=True)
+    for seed, symbol in enumerate(symbols):
+        make_history(n_days, seed=seed).to_csv(os.path.join(directory, f"{symbol}.csv"), index=False)
@@ -12,6 +12,31 @@ DB_PASSWORD = os.getenv("DB_PASSWORD", "password")
 DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 
+# Connection pool used by data/database.py
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))  # seconds to wait for a free connection
+DB_POOL_PING_INTERVAL = float(os.getenv("DB_POOL_PING_INTERVAL", "60"))  # ping connections idle longer than this
+
+# asyncpg pool used by data/async_database.py, separate from the psycopg2 pool
+# so each process holds at most DB_POOL_MAX_SIZE + ASYNC_DB_POOL_MAX_SIZE connections
+ASYNC_DB_POOL_MIN_SIZE = int(os.getenv("ASYNC_DB_POOL_MIN_SIZE", "1"))
+ASYNC_DB_POOL_MAX_SIZE = int(os.getenv("ASYNC_DB_POOL_MAX_SIZE", "10"))
+
+# In-process cache of per-symbol price frames read from stock_prices
+PRICE_CACHE_TTL = float(os.getenv("PRICE_CACHE_TTL", "300"))  # seconds
+PRICE_CACHE_MAX_SYMBOLS = int(os.getenv("PRICE_CACHE_MAX_SYMBOLS", "32"))
+
+# Bulk writes to stock_prices: "copy" (COPY FROM STDIN) or "insert" (execute_values)
+DB_BULK_INSERT_METHOD = os.getenv("DB_BULK_INSERT_METHOD", "copy")
+
+# Market data source: "yfinance" or "local" (files in MARKET_DATA_DIR)
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance")
+MARKET_DATA_DIR = os.getenv("MARKET_DATA_DIR", "market_data")
+# On-disk cache for provider responses ("" disables it)
+MARKET_DATA_CACHE_PATH = os.getenv("MARKET_DATA_CACHE_PATH", ".cache/market_data.sqlite")
+MARKET_DATA_CACHE_TTL = float(os.getenv("MARKET_DATA_CACHE_TTL", "3600"))  # seconds
+
 # Available stock symbols
 AVAILABLE_SYMBOLS: List[str] = [
     "AAPL", "MSFT", "GOOGL", "AMZN", "META", 
@@ -37,10 +62,37 @@ MODEL_PARAMS = {
 # Portfolio simulation defaults
 DEFAULT_INITIAL_BALANCE = 10000
 DEFAULT_SIMULATION_DAYS = 90
+SWEEP_MAX_CELLS = 1000  # largest parameter grid accepted by /api/portfolio/sweep
+
+# Walk-forward models cached across portfolio simulations
+MODEL_CACHE_MAX_ENTRIES = int(os.getenv("MODEL_CACHE_MAX_ENTRIES", "64"))
+MODEL_CACHE_MAX_BYTES = int(os.getenv("MODEL_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Directory shared by all processes for trained models ("" keeps models in memory only)
+MODEL_CACHE_DIR = os.getenv("MODEL_CACHE_DIR", ".cache/models")
+MODEL_CACHE_DISK_TTL = float(os.getenv("MODEL_CACHE_DISK_TTL", str(7 * 24 * 3600)))  # seconds
+
+# Process pool for CPU-bound work (simulation, training)
+COMPUTE_WORKERS = int(os.getenv("COMPUTE_WORKERS", str(max(1, (os.cpu_count() or 2) - 1))))
+COMPUTE_MAX_QUEUE = int(os.getenv("COMPUTE_MAX_QUEUE", "4"))  # jobs waiting beyond the running ones
+COMPUTE_JOB_TIMEOUT = float(os.getenv("COMPUTE_JOB_TIMEOUT", "120"))  # seconds
+
+# Threads scoring symbols concurrently for /api/predict
+PREDICT_BATCH_WORKERS = int(os.getenv("PREDICT_BATCH_WORKERS", str(min(8, os.cpu_count() or 1))))
+
+# Write-behind queue for prediction_history inserts
+PREDICTION_WRITE_BATCH_SIZE = int(os.getenv("PREDICTION_WRITE_BATCH_SIZE", "100"))  # rows per INSERT
+PREDICTION_WRITE_INTERVAL = float(os.getenv("PREDICTION_WRITE_INTERVAL", "1.0"))  # seconds before a partial batch is flushed
+PREDICTION_WRITE_MAX_QUEUE = int(os.getenv("PREDICTION_WRITE_MAX_QUEUE", "10000"))  # beyond this, writes are synchronous
+PREDICTION_WRITE_MAX_RETRIES = int(os.getenv("PREDICTION_WRITE_MAX_RETRIES", "3"))
 
 # API settings
 API_HOST = "0.0.0.0"
 API_PORT = 8000
+RESPONSE_COMPRESSION_MIN_SIZE = 1024  # bytes; smaller API responses are not compressed
 
 # Updates
-MODEL_UPDATE_INTERVAL = 24 * 60 * 60  # 24 hours in seconds
\ No newline at end of file
+MODEL_UPDATE_INTERVAL = 24 * 60 * 60  # 24 hours in seconds
+
+# HTTP caching: price history only changes when the update task runs, so
+# clients may reuse it for a fraction of the interval before revalidating
+STOCK_CACHE_MAX_AGE = MODEL_UPDATE_INTERVAL // 24
\ No newline at end of file
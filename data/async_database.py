@@ -0,0 +1,223 @@
+# data/async_database.py
+"""
+Asyncio-native database operations for the FastAPI handlers
+
+Mirrors the helpers in data/database.py on top of an asyncpg pool so route
+handlers can await database I/O instead of blocking the event loop.
+"""
+import asyncio
+import json
+import asyncpg
+from typing import Optional, Dict, Any, List
+from datetime import datetime
+
+from config import (
+    DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT,
+    ASYNC_DB_POOL_MIN_SIZE, ASYNC_DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT
+)
+
+_pool: Optional[asyncpg.Pool] = None
+_pool_lock: Optional[asyncio.Lock] = None
+
+async def get_async_pool() -> Optional[asyncpg.Pool]:
+    """
+    Get the asyncpg pool, creating it on first use
+    
+    Returns:
+        Pool object or None if the database is unreachable
+    """
+    global _pool, _pool_lock
+    
+    if _pool is not None:
+        return _pool
+    
+    if _pool_lock is None:
+        _pool_lock = asyncio.Lock()
+    
+    async with _pool_lock:
+        if _pool is None:
+            try:
+                _pool = await asyncpg.create_pool(
+                    database=DB_NAME,
+                    user=DB_USER,
+                    password=DB_PASSWORD,
+                    host=DB_HOST,
+                    port=int(DB_PORT),
+                    ssl=False,
+                    min_size=ASYNC_DB_POOL_MIN_SIZE,
+                    max_size=ASYNC_DB_POOL_MAX_SIZE,
+                    timeout=DB_POOL_TIMEOUT
+                )
+            except Exception as e:
+                print("Async database connection failed:", e)
+                return None
+    return _pool
+
+async def close_async_pool() -> None:
+    """
+    Close the asyncpg pool (called on application shutdown)
+    """
+    global _pool
+    
+    if _pool is not None:
+        await _pool.close()
+        _pool = None
+
+def _format_predictions(rows) -> List[Dict[str, Any]]:
+    return [
+        {
+            "id": row["id"],
+            "symbol": row["symbol"],
+            "date": row["prediction_date"].strftime("%Y-%m-%d"),
+            "predicted_movement": row["predicted_movement"],
+            "confidence": row["confidence"],
+            "actual_movement": row["actual_movement"]
+        }
+        for row in rows
+    ]
+
+async def get_recent_predictions(symbol: str, limit: int = 5) -> List[Dict[str, Any]]:
+    """
+    Get recent predictions for a symbol
+    
+    Args:
+        symbol: Stock symbol
+        limit: Maximum number of predictions to return
+    
+    Returns:
+        List of prediction dictionaries
+    """
+    pool = await get_async_pool()
+    if pool is None:
+        return []
+    
+    try:
+        rows = await pool.fetch(
+            """SELECT id, symbol, prediction_date, predicted_movement, confidence, actual_movement
+               FROM prediction_history 
+               WHERE symbol = $1
+               ORDER BY prediction_date DESC
+               LIMIT $2""",
+            symbol, limit,
+            timeout=DB_POOL_TIMEOUT
+        )
+    except Exception as e:
+        print(f"Error retrieving recent predictions: {e}")
+        return []
+    
+    return _format_predictions(rows)
+
+async def get_prediction_history(symbol: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+    """
+    Get prediction history
+    
+    Args:
+        symbol: Optional stock symbol to filter by
+        limit: Maximum number of predictions to return
+    
+    Returns:
+        List of prediction dictionaries
+    """
+    pool = await get_async_pool()
+    if pool is None:
+        return []
+    
+    try:
+        if symbol:
+            rows = await pool.fetch(
+                """SELECT id, symbol, prediction_date, predicted_movement, confidence, actual_movement
+                   FROM prediction_history 
+                   WHERE symbol = $1
+                   ORDER BY prediction_date DESC
+                   LIMIT $2""",
+                symbol, limit,
+                timeout=DB_POOL_TIMEOUT
+            )
+        else:
+            rows = await pool.fetch(
+                """SELECT id, symbol, prediction_date, predicted_movement, confidence, actual_movement
+                   FROM prediction_history 
+                   ORDER BY prediction_date DESC
+                   LIMIT $1""",
+                limit,
+                timeout=DB_POOL_TIMEOUT
+            )
+    except Exception as e:
+        print(f"Error retrieving prediction history: {e}")
+        return []
+    
+    return _format_predictions(rows)
+
+async def get_prediction_history_signature(symbol: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Get a cheap fingerprint of the stored prediction history
+    
+    The fingerprint changes when a prediction is added (latest id), replaced
+    in place (latest prediction date) or resolved (number of unresolved
+    predictions).
+    
+    Args:
+        symbol: Optional stock symbol to filter by
+    
+    Returns:
+        Dictionary with latest_id, latest_date and unresolved, or None on error
+    """
+    pool = await get_async_pool()
+    if pool is None:
+        return None
+    
+    query = """SELECT MAX(id) AS latest_id, MAX(prediction_date) AS latest_date,
+                      COUNT(*) FILTER (WHERE actual_movement IS NULL) AS unresolved
+               FROM prediction_history"""
+    try:
+        if symbol:
+            row = await pool.fetchrow(query + " WHERE symbol = $1", symbol, timeout=DB_POOL_TIMEOUT)
+        else:
+            row = await pool.fetchrow(query, timeout=DB_POOL_TIMEOUT)
+    except Exception as e:
+        print(f"Error retrieving prediction history signature: {e}")
+        return None
+    
+    return dict(row)
+
+async def save_portfolio_simulation(
+    start_date: datetime,
+    end_date: datetime,
+    initial_balance: float,
+    final_balance: float,
+    roi: float,
+    trades: List[Dict[str, Any]],
+    strategy: str = "ai_prediction"
+) -> bool:
+    """
+    Save a portfolio simulation to the database
+    
+    Args:
+        start_date: Simulation start date
+        end_date: Simulation end date
+        initial_balance: Initial portfolio balance
+        final_balance: Final portfolio balance
+        roi: Return on investment percentage
+        trades: List of trade dictionaries
+        strategy: Strategy name
+    
+    Returns:
+        bool: True if successful, False otherwise
+    """
+    pool = await get_async_pool()
+    if pool is None:
+        return False
+    
+    try:
+        await pool.execute(
+            """INSERT INTO portfolio_simulation 
+               (start_date, end_date, initial_balance, final_balance, roi, trades, strategy) 
+               VALUES ($1, $2, $3, $4, $5, $6, $7)""",
+            start_date, end_date, float(initial_balance), float(final_balance),
+            float(roi), json.dumps(trades), strategy,
+            timeout=DB_POOL_TIMEOUT
+        )
+        return True
+    except Exception as e:
+        print(f"Error saving portfolio simulation: {e}")
+        return False
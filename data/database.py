@@ -2,95 +2,416 @@
 """
 Database connection and operations for the AI Trading Platform
 """
+import io
+import os
+import threading
+import time
+from contextlib import contextmanager
 import psycopg2
+from psycopg2 import extensions
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import pandas as pd
-from typing import Optional, Dict, Any, List, Tuple
+from typing import Optional, Dict, Any, List, Tuple, Iterator
 import json
-from datetime import datetime
+from datetime import datetime, timedelta
 
-from config import DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT
+from utils.cache import LRUCache
+from config import (
+    DB_NAME, DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_BULK_INSERT_METHOD,
+    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT, DB_POOL_PING_INTERVAL,
+    PRICE_CACHE_TTL, PRICE_CACHE_MAX_SYMBOLS
+)
+
+# Column order used by the bulk writers for stock_prices
+STOCK_PRICE_COLUMNS = [
+    "symbol", "date", "open_price", "close_price",
+    "high_price", "low_price", "volume", "adjusted_close"
+]
+
+def _connection_params() -> Dict[str, Any]:
+    return {
+        "dbname": DB_NAME,
+        "user": DB_USER,
+        "password": DB_PASSWORD,
+        "host": DB_HOST,
+        "port": DB_PORT,
+        "sslmode": "disable"
+    }
 
 def connect_db():
     """
-    Create a connection to the PostgreSQL database
+    Create a standalone connection to the PostgreSQL database
+    
+    Application code should prefer db_connection(), which reuses pooled
+    connections; this is kept for scripts and one-off maintenance work.
     
     Returns:
         Connection object or None if connection fails
     """
     try:
-        conn = psycopg2.connect(
-            dbname=DB_NAME,
-            user=DB_USER,
-            password=DB_PASSWORD,
-            host=DB_HOST,
-            port=DB_PORT,
-            sslmode="disable"
-        )
+        conn = psycopg2.connect(**_connection_params())
         return conn
     except Exception as e:
         print("Database connection failed:", e)
         return None
 
-def create_tables():
-    conn = connect_db()
-    if conn is None:
+# Process-wide connection pool, created lazily and recreated after fork
+_pool: Optional[ThreadedConnectionPool] = None
+_pool_pid: Optional[int] = None
+_pool_slots: Optional[threading.BoundedSemaphore] = None
+_pool_lock = threading.Lock()
+_last_used: Dict[int, float] = {}
+
+_pool_stats = {
+    "checkouts": 0,
+    "waits": 0,
+    "timeouts": 0,
+    "discarded": 0,
+    "in_use": 0,
+    "total_wait_seconds": 0.0,
+    "max_wait_seconds": 0.0,
+    "total_checkout_seconds": 0.0,
+    "max_checkout_seconds": 0.0
+}
+
+def _get_pool() -> Optional[ThreadedConnectionPool]:
+    """
+    Get the connection pool for this process, creating it if needed
+    
+    Returns:
+        Pool object or None if the database is unreachable
+    """
+    global _pool, _pool_pid, _pool_slots
+    
+    pid = os.getpid()
+    if _pool is not None and _pool_pid == pid:
+        return _pool
+    
+    with _pool_lock:
+        if _pool is not None and _pool_pid == pid:
+            return _pool
+        try:
+            # Connections inherited from a parent process must not be reused
+            _pool = ThreadedConnectionPool(DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, **_connection_params())
+        except Exception as e:
+            print("Database connection failed:", e)
+            _pool = None
+            return None
+        _pool_pid = pid
+        _pool_slots = threading.BoundedSemaphore(DB_POOL_MAX_SIZE)
+        _last_used.clear()
+        return _pool
+
+def _is_healthy(conn) -> bool:
+    """
+    Check a pooled connection before handing it out
+    
+    Connections idle for longer than DB_POOL_PING_INTERVAL are pinged, the
+    rest are only checked for having been closed.
+    """
+    if conn.closed:
         return False
     
+    last_used = _last_used.get(id(conn))
+    if last_used is None or time.monotonic() - last_used < DB_POOL_PING_INTERVAL:
+        return True
+    
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        cursor.close()
+        conn.rollback()
+        return True
+    except psycopg2.Error:
+        return False
+
+def _record_checkout(wait_seconds: float, checkout_seconds: float, waited: bool) -> None:
+    with _pool_lock:
+        _pool_stats["checkouts"] += 1
+        _pool_stats["in_use"] += 1
+        if waited:
+            _pool_stats["waits"] += 1
+        _pool_stats["total_wait_seconds"] += wait_seconds
+        _pool_stats["max_wait_seconds"] = max(_pool_stats["max_wait_seconds"], wait_seconds)
+        _pool_stats["total_checkout_seconds"] += checkout_seconds
+        _pool_stats["max_checkout_seconds"] = max(_pool_stats["max_checkout_seconds"], checkout_seconds)
+
+def _increment_stat(name: str, amount: int = 1) -> None:
+    with _pool_lock:
+        _pool_stats[name] += amount
+
+def _checkout(pool: ThreadedConnectionPool):
+    """
+    Take a healthy connection from the pool, replacing stale ones
+    
+    Returns:
+        Connection object or None if no connection could be opened
+    """
+    conn = None
+    try:
+        conn = pool.getconn()
+        while not _is_healthy(conn):
+            _increment_stat("discarded")
+            _last_used.pop(id(conn), None)
+            pool.putconn(conn, close=True)
+            conn = None
+            conn = pool.getconn()
+        return conn
+    except Exception as e:
+        print("Database connection failed:", e)
+        if conn is not None:
+            pool.putconn(conn, close=True)
+        return None
+
+@contextmanager
+def db_connection() -> Iterator[Optional[Any]]:
+    """
+    Check out a connection from the process-wide pool
+    
+    Waits up to DB_POOL_TIMEOUT seconds when all connections are in use.
+    Uncommitted work is rolled back when the block exits and broken
+    connections are discarded instead of being returned to the pool.
+    
+    Yields:
+        Connection object or None if no connection is available
+    """
+    start = time.perf_counter()
+    pool = _get_pool()
+    if pool is None:
+        yield None
+        return
+    
+    slots = _pool_slots
+    waited = not slots.acquire(blocking=False)
+    if waited and not slots.acquire(timeout=DB_POOL_TIMEOUT):
+        _increment_stat("timeouts")
+        print(f"Timed out after {DB_POOL_TIMEOUT}s waiting for a database connection")
+        yield None
+        return
+    wait_seconds = time.perf_counter() - start
+    
+    conn = _checkout(pool)
+    if conn is None:
+        slots.release()
+        yield None
+        return
+    _record_checkout(wait_seconds, time.perf_counter() - start, waited)
+    
+    try:
+        yield conn
+    finally:
+        broken = conn.closed != 0
+        if not broken and conn.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                broken = True
+        if broken:
+            _increment_stat("discarded")
+            _last_used.pop(id(conn), None)
+        else:
+            _last_used[id(conn)] = time.monotonic()
+        pool.putconn(conn, close=broken)
+        _increment_stat("in_use", -1)
+        slots.release()
+
+def get_pool_stats() -> Dict[str, Any]:
+    """
+    Get connection pool instrumentation counters
+    
+    Returns:
+        Dictionary with checkout/wait counts and latencies in milliseconds
+    """
+    with _pool_lock:
+        stats = dict(_pool_stats)
+    
+    checkouts = stats["checkouts"] or 1
+    return {
+        "min_size": DB_POOL_MIN_SIZE,
+        "max_size": DB_POOL_MAX_SIZE,
+        "checkouts": stats["checkouts"],
+        "in_use": stats["in_use"],
+        "waits": stats["waits"],
+        "timeouts": stats["timeouts"],
+        "discarded": stats["discarded"],
+        "avg_wait_ms": stats["total_wait_seconds"] / checkouts * 1000,
+        "max_wait_ms": stats["max_wait_seconds"] * 1000,
+        "avg_checkout_ms": stats["total_checkout_seconds"] / checkouts * 1000,
+        "max_checkout_ms": stats["max_checkout_seconds"] * 1000
+    }
+
+def close_pool() -> None:
+    """
+    Close all pooled connections (called on application shutdown)
+    """
+    global _pool, _pool_pid
+    
+    with _pool_lock:
+        if _pool is not None and _pool_pid == os.getpid():
+            _pool.closeall()
+        _pool = None
+        _pool_pid = None
+        _last_used.clear()
+
+def create_tables() -> bool:
+    """
+    Bring the database schema up to date
+    
+    Applies pending migrations from data/migrations.py; existing tables and
+    data are preserved across restarts.
+    
+    Returns:
+        bool: True if the schema is current, False otherwise
+    """
+    from data.migrations import apply_migrations
+    
+    with db_connection() as conn:
+        if conn is None:
+            return False
+        
+        try:
+            apply_migrations(conn)
+            return True
+        except Exception as e:
+            print(f"Error applying database migrations: {e}")
+            return False
+
+def _stock_price_records(symbol: str, data: pd.DataFrame) -> pd.DataFrame:
+    """
+    Map a yfinance-style DataFrame onto the stock_prices column layout
+    
+    Args:
+        symbol: Stock symbol
+        data: DataFrame with Date/Open/High/Low/Close/Volume columns
+    
+    Returns:
+        DataFrame with columns in STOCK_PRICE_COLUMNS order
+    """
+    dates = pd.to_datetime(data["Date"])
+    # stock_prices.date is a naive TIMESTAMP, so store the exchange-local date
+    if dates.dt.tz is not None:
+        dates = dates.dt.tz_localize(None)
+    
+    adjusted = data["Adj Close"] if "Adj Close" in data.columns else data["Close"]
+    
+    records = pd.DataFrame({
+        "symbol": symbol,
+        "date": dates.values,
+        "open_price": data["Open"].astype(float).values,
+        "close_price": data["Close"].astype(float).values,
+        "high_price": data["High"].astype(float).values,
+        "low_price": data["Low"].astype(float).values,
+        "volume": data["Volume"].fillna(0).astype("int64").values,
+        "adjusted_close": adjusted.astype(float).values
+    })
+    # The upsert can only touch each (symbol, date) once per statement
+    records = records.drop_duplicates(subset="date", keep="last")
+    return records[STOCK_PRICE_COLUMNS]
+
+# Columns overwritten when an incoming bar already exists
+_UPSERT_ASSIGNMENTS = ", ".join(
+    f"{col} = EXCLUDED.{col}" for col in STOCK_PRICE_COLUMNS if col not in ("symbol", "date")
+)
+
+def _copy_stock_prices(cursor, records: pd.DataFrame) -> None:
+    """
+    Stream records through a staging table with COPY FROM STDIN and upsert them
+    """
+    cursor.execute(
+        """CREATE TEMP TABLE IF NOT EXISTS stock_prices_staging
+           (LIKE stock_prices INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"""
+    )
+    
+    buffer = io.StringIO()
+    records.to_csv(buffer, index=False, header=False, date_format="%Y-%m-%d %H:%M:%S")
+    buffer.seek(0)
+    columns = ", ".join(STOCK_PRICE_COLUMNS)
+    cursor.copy_expert(
+        f"COPY stock_prices_staging ({columns}) FROM STDIN WITH (FORMAT csv)",
+        buffer
+    )
+    cursor.execute(
+        f"""INSERT INTO stock_prices ({columns})
+            SELECT {columns} FROM stock_prices_staging
+            ON CONFLICT (symbol, date) DO UPDATE SET {_UPSERT_ASSIGNMENTS}"""
+    )
+
+def _insert_stock_prices(cursor, records: pd.DataFrame) -> None:
+    """
+    Upsert records into stock_prices with multi-row INSERT statements
+    """
+    rows = [
+        (symbol, date.to_pydatetime(), float(open_price), float(close_price),
+         float(high_price), float(low_price), int(volume), float(adjusted_close))
+        for symbol, date, open_price, close_price, high_price, low_price, volume, adjusted_close
+        in records.itertuples(index=False, name=None)
+    ]
+    execute_values(
+        cursor,
+        f"""INSERT INTO stock_prices ({', '.join(STOCK_PRICE_COLUMNS)}) VALUES %s
+            ON CONFLICT (symbol, date) DO UPDATE SET {_UPSERT_ASSIGNMENTS}""",
+        rows,
+        page_size=1000
+    )
+
+def write_stock_prices(conn, symbol: str, data: pd.DataFrame) -> int:
+    """
+    Upsert bars for a symbol on (symbol, date) in a single transaction
+    
+    Existing rows are updated in place rather than deleted, so readers never
+    see a symbol without data while a refresh is running. The rows are
+    streamed with COPY; if the server rejects COPY (e.g. behind a pooler that
+    does not support it) the writer falls back to execute_values.
+    The caller owns the connection, this function commits on success.
+    
+    Args:
+        conn: Open database connection
+        symbol: Stock symbol
+        data: yfinance-style DataFrame with stock data
+    
+    Returns:
+        int: Number of rows written
+    """
+    records = _stock_price_records(symbol, data)
+    if records.empty:
+        return 0
+    
     cursor = conn.cursor()
-    # Drop tables if they exist to ensure clean schema
-    cursor.execute("DROP TABLE IF EXISTS stock_prices CASCADE;")
-    cursor.execute("DROP TABLE IF EXISTS prediction_history CASCADE;")
-    cursor.execute("DROP TABLE IF EXISTS portfolio_simulation CASCADE;")
-    
-    # Create stock_prices table with correct column names
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS stock_prices (
-            id SERIAL PRIMARY KEY,
-            symbol VARCHAR(10),
-            date TIMESTAMP,
-            open_price FLOAT,
-            close_price FLOAT,
-            high_price FLOAT,  
-            low_price FLOAT,
-            volume INT,
-            adjusted_close FLOAT
-        );
-    """)
-    
-    # Create a table for model predictions
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS prediction_history (
-            id SERIAL PRIMARY KEY,
-            symbol VARCHAR(10),
-            prediction_date TIMESTAMP,
-            predicted_movement BOOLEAN,
-            confidence FLOAT,
-            actual_movement BOOLEAN NULL,
-            features JSON
-        );
-    """)
-    
-    # Create a table for portfolio simulation
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS portfolio_simulation (
-            id SERIAL PRIMARY KEY,
-            start_date TIMESTAMP,
-            end_date TIMESTAMP,
-            initial_balance FLOAT,
-            final_balance FLOAT,
-            roi FLOAT,
-            trades JSON,
-            strategy VARCHAR(50)
-        );
-    """)
-    
-    conn.commit()
-    conn.close()
-    return True
+    
+    try:
+        if DB_BULK_INSERT_METHOD == "copy":
+            cursor.execute("SAVEPOINT bulk_copy")
+            try:
+                _copy_stock_prices(cursor, records)
+                cursor.execute("RELEASE SAVEPOINT bulk_copy")
+            except psycopg2.Error as e:
+                print(f"COPY into stock_prices failed, falling back to INSERT: {e}")
+                cursor.execute("ROLLBACK TO SAVEPOINT bulk_copy")
+                _insert_stock_prices(cursor, records)
+        else:
+            _insert_stock_prices(cursor, records)
+        
+        # Rolling features of later bars depend on these ones, so drop the
+        # stored features from the first written date onward; the feature
+        # store recomputes them on the next read
+        cursor.execute(
+            "DELETE FROM stock_features WHERE symbol = %s AND date >= %s",
+            (symbol, records["date"].min().to_pydatetime())
+        )
+        
+        conn.commit()
+        return len(records)
+    except Exception:
+        conn.rollback()
+        raise
 
 def save_stock_data(symbol: str, data: pd.DataFrame) -> bool:
     """
-    Save stock data to the database
+    Save stock data to the database, upserting bars that already exist
+    
+    The price cache is refilled with the new history afterwards, so filtered
+    reads (e.g. chart requests) are served from memory rather than from SQL.
     
     Args:
         symbol: Stock symbol
@@ -99,48 +420,112 @@ def save_stock_data(symbol: str, data: pd.DataFrame) -> bool:
     Returns:
         bool: True if successful, False otherwise
     """
-    conn = connect_db()
-    if conn is None:
-        return False
+    with db_connection() as conn:
+        if conn is None:
+            return False
         
-    cursor = conn.cursor()
-    
-    # First clear existing data for this symbol
-    cursor.execute("DELETE FROM stock_prices WHERE symbol = %s", (symbol,))
-    
-    # Insert new data
-    for _, row in data.iterrows():
-        cursor.execute(
-            """INSERT INTO stock_prices 
-               (symbol, date, open_price, close_price, high_price, low_price, volume, adjusted_close) 
-               VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
-            (symbol, row["Date"], row["Open"], row["Close"], 
-             row["High"], row["Low"], row["Volume"], 
-             row["Close"] if "Adj Close" not in row else row["Adj Close"])
-        )
+        try:
+            write_stock_prices(conn, symbol, data)
+            saved = True
+        except Exception as e:
+            print(f"Error saving stock data for {symbol}: {e}")
+            saved = False
+        finally:
+            from data.feature_store import invalidate_features
+            invalidate_stock_data(symbol)
+            invalidate_features(symbol)
+    
+    if saved:
+        _price_cache.get_or_compute(symbol, lambda: _load_stock_data(symbol))
+    return saved
 
-    conn.commit()
-    conn.close()
-    return True
+# Read-through cache of per-symbol price frames. Writes through
+# save_stock_data invalidate the symbol; the TTL bounds staleness for
+# other processes (e.g. compute workers) that do not see those writes.
+_price_cache = LRUCache(max_entries=PRICE_CACHE_MAX_SYMBOLS, ttl=PRICE_CACHE_TTL)
 
-def get_stock_data(symbol: str) -> Optional[pd.DataFrame]:
+def invalidate_stock_data(symbol: Optional[str] = None) -> None:
     """
-    Retrieve stock data from the database
+    Drop cached price frames for a symbol (all symbols if None)
+    """
+    _price_cache.invalidate(None if symbol is None else (lambda key: key == symbol))
+
+def get_price_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss counters for the price frame cache
+    """
+    return _price_cache.stats()
+
+def get_stock_data(
+    symbol: str,
+    limit: Optional[int] = None,
+    columns: Optional[List[str]] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Retrieve stock data, from the price cache or the database
+    
+    Without filters the full history is read through the price cache. With a
+    row limit or column list the filter is applied to the cached frame if the
+    symbol is cached (save_stock_data keeps it warm), and pushed down into SQL
+    otherwise.
     
     Args:
         symbol: Stock symbol
+        limit: Only return the most recent rows
+        columns: Columns to return (all stock_prices columns if None)
     
     Returns:
-        DataFrame with stock data or None if retrieval fails
+        DataFrame ordered by date or None if retrieval fails
+    """
+    if limit is None and columns is None:
+        df = _price_cache.get_or_compute(symbol, lambda: _load_stock_data(symbol))
+        # Callers are free to modify the frame they get back
+        return df.copy() if df is not None else None
+    
+    if columns is not None:
+        unknown = set(columns) - set(STOCK_PRICE_COLUMNS) - {"id"}
+        if unknown:
+            raise ValueError(f"Unknown stock_prices columns: {sorted(unknown)}")
+        if "date" not in columns:
+            columns = ["date"] + list(columns)
+    
+    df = _price_cache.get(symbol)
+    if df is None:
+        return _load_stock_data(symbol, limit, columns)
+    
+    if limit is not None:
+        df = df.tail(limit)
+    if columns is not None:
+        df = df[columns]
+    if df.empty:
+        return None
+    # Callers are free to modify the frame they get back
+    return df.reset_index(drop=True).copy()
+
+def _load_stock_data(
+    symbol: str,
+    limit: Optional[int] = None,
+    columns: Optional[List[str]] = None
+) -> Optional[pd.DataFrame]:
+    """
+    Retrieve stock data from the database
     """
+    select = ", ".join(columns) if columns else "*"
+    params: Dict[str, Any] = {"symbol": symbol}
+    query = f"SELECT {select} FROM stock_prices WHERE symbol = %(symbol)s"
+    if limit is not None:
+        # Read the newest rows via the (symbol, date) index, then restore order
+        query = f"SELECT * FROM ({query} ORDER BY date DESC LIMIT %(limit)s) recent ORDER BY date"
+        params["limit"] = limit
+    else:
+        query += " ORDER BY date"
+    
     try:
-        conn = connect_db()
-        if conn is None:
-            return None
+        with db_connection() as conn:
+            if conn is None:
+                return None
             
-        query = f"SELECT * FROM stock_prices WHERE symbol='{symbol}' ORDER BY date"
-        df = pd.read_sql(query, conn)
-        conn.close()
+            df = pd.read_sql(query, conn, params=params)
         
         if not df.empty:
             return df
@@ -149,46 +534,152 @@ def get_stock_data(symbol: str) -> Optional[pd.DataFrame]:
         print(f"Error retrieving data from database: {e}")
         return None
 
-def save_prediction(
-    symbol: str, 
-    prediction_date: datetime, 
-    predicted_movement: bool, 
-    confidence: float, 
-    features: Dict[str, float]
-) -> bool:
+def get_latest_stock_date(symbol: str) -> Optional[datetime]:
     """
-    Save a prediction to the database
+    Get the date of the most recent stored bar for a symbol
     
     Args:
         symbol: Stock symbol
-        prediction_date: Date of the prediction
-        predicted_movement: True for up, False for down
-        confidence: Prediction confidence (0-1)
-        features: Feature values used for prediction
     
     Returns:
-        bool: True if successful, False otherwise
+        Latest bar date or None if the symbol has no stored data
     """
-    conn = connect_db()
-    if conn is None:
-        return False
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX(date) FROM stock_prices WHERE symbol = %s", (symbol,))
+            return cursor.fetchone()[0]
+        except Exception as e:
+            print(f"Error retrieving latest date for {symbol}: {e}")
+            return None
+
+def get_latest_stock_bar(symbol: str) -> Optional[Tuple[datetime, float, int, int]]:
+    """
+    Get a cheap fingerprint of a symbol's stored bars
+    
+    Served from the price cache when the symbol is cached, otherwise read
+    through the (symbol, date) index.
+    
+    Args:
+        symbol: Stock symbol
+    
+    Returns:
+        (date, close_price, volume, id) of the latest bar or None if the
+        symbol has no stored data
+    """
+    df = _price_cache.get(symbol)
+    if df is not None and not df.empty:
+        latest = df.iloc[-1]
+        return (latest["date"].to_pydatetime(), float(latest["close_price"]), 
+                int(latest["volume"]), int(latest["id"]))
+    
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        
+        try:
+            cursor = conn.cursor()
+            cursor.execute(
+                """SELECT date, close_price, volume, id FROM stock_prices 
+                   WHERE symbol = %s ORDER BY date DESC LIMIT 1""",
+                (symbol,)
+            )
+            return cursor.fetchone()
+        except Exception as e:
+            print(f"Error retrieving latest bar for {symbol}: {e}")
+            return None
+
+def write_predictions(
+    conn, 
+    predictions: List[Tuple[str, datetime, bool, float, Dict[str, float], str, datetime]]
+) -> int:
+    """
+    Insert several predictions with a single multi-row INSERT
+    
+    A prediction whose (symbol, model_version, bar_date) is already stored
+    replaces the stored one if its outcome differs (the latest bar was
+    rewritten after a partial session) and is skipped otherwise, so the same
+    model scoring the same bar is persisted once. The caller owns the
+    connection, this function commits on success and rolls back and
+    re-raises on failure.
+    
+    Args:
+        conn: Open database connection
+        predictions: (symbol, prediction_date, predicted_movement, confidence,
+            features, model_version, bar_date) tuples
+    
+    Returns:
+        int: Number of predictions inserted or updated
+    """
+    if not predictions:
+        return 0
+    
+    # An upsert can only touch each key once per statement; keep the latest
+    latest = {}
+    for prediction in predictions:
+        symbol, _, _, _, _, model_version, bar_date = prediction
+        latest[(symbol, model_version, bar_date)] = prediction
+    predictions = list(latest.values())
     
     cursor = conn.cursor()
     
     try:
-        cursor.execute(
+        execute_values(
+            cursor,
             """INSERT INTO prediction_history 
-               (symbol, prediction_date, predicted_movement, confidence, features) 
-               VALUES (%s, %s, %s, %s, %s)""",
-            (symbol, prediction_date, predicted_movement, confidence, json.dumps(features))
+               (symbol, prediction_date, predicted_movement, confidence, features, model_version, bar_date) 
+               VALUES %s
+               ON CONFLICT (symbol, model_version, bar_date) DO UPDATE
+               SET prediction_date = EXCLUDED.prediction_date,
+                   predicted_movement = EXCLUDED.predicted_movement,
+                   confidence = EXCLUDED.confidence,
+                   features = EXCLUDED.features
+               WHERE prediction_history.predicted_movement IS DISTINCT FROM EXCLUDED.predicted_movement
+                  OR prediction_history.confidence IS DISTINCT FROM EXCLUDED.confidence
+                  OR prediction_history.features::text IS DISTINCT FROM EXCLUDED.features::text""",
+            [
+                (symbol, prediction_date, predicted_movement, confidence, json.dumps(features), model_version, bar_date)
+                for symbol, prediction_date, predicted_movement, confidence, features, model_version, bar_date
+                in predictions
+            ],
+            page_size=len(predictions)
         )
+        written = cursor.rowcount
         conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        print(f"Error saving prediction: {e}")
-        conn.close()
-        return False
+        return written
+    except Exception:
+        conn.rollback()
+        raise
+
+def save_predictions(
+    predictions: List[Tuple[str, datetime, bool, float, Dict[str, float], str, datetime]]
+) -> int:
+    """
+    Save several predictions to the database with a single INSERT
+    
+    Args:
+        predictions: (symbol, prediction_date, predicted_movement, confidence,
+            features, model_version, bar_date) tuples, as taken by
+            write_predictions
+    
+    Returns:
+        int: Number of predictions saved
+    """
+    if not predictions:
+        return 0
+    
+    with db_connection() as conn:
+        if conn is None:
+            return 0
+        
+        try:
+            return write_predictions(conn, predictions)
+        except Exception as e:
+            print(f"Error saving predictions: {e}")
+            return 0
 
 def get_recent_predictions(symbol: str, limit: int = 5) -> List[Dict[str, Any]]:
     """
@@ -201,22 +692,23 @@ def get_recent_predictions(symbol: str, limit: int = 5) -> List[Dict[str, Any]]:
     Returns:
         List of prediction dictionaries
     """
-    conn = connect_db()
-    if conn is None:
-        return []
-    
-    cursor = conn.cursor()
-    cursor.execute(
-        """SELECT id, symbol, prediction_date, predicted_movement, confidence, actual_movement
-           FROM prediction_history 
-           WHERE symbol = %s
-           ORDER BY prediction_date DESC
-           LIMIT %s""",
-        (symbol, limit)
-    )
+    with db_connection() as conn:
+        if conn is None:
+            return []
+        
+        cursor = conn.cursor()
+        cursor.execute(
+            """SELECT id, symbol, prediction_date, predicted_movement, confidence, actual_movement
+               FROM prediction_history 
+               WHERE symbol = %s
+               ORDER BY prediction_date DESC
+               LIMIT %s""",
+            (symbol, limit)
+        )
+        rows = cursor.fetchall()
     
     predictions = []
-    for row in cursor.fetchall():
+    for row in rows:
         predictions.append({
             "id": row[0],
             "symbol": row[1],
@@ -226,7 +718,6 @@ def get_recent_predictions(symbol: str, limit: int = 5) -> List[Dict[str, Any]]:
             "actual_movement": row[5]
         })
     
-    conn.close()
     return predictions
 
 def get_prediction_history(symbol: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
@@ -240,32 +731,33 @@ def get_prediction_history(symbol: Optional[str] = None, limit: int = 100) -> Li
     Returns:
         List of prediction dictionaries
     """
-    conn = connect_db()
-    if conn is None:
-        return []
-    
-    cursor = conn.cursor()
-    
-    if symbol:
-        cursor.execute(
-            """SELECT id, symbol, prediction_date, predicted_movement, confidence, actual_movement
-               FROM prediction_history 
-               WHERE symbol = %s
-               ORDER BY prediction_date DESC
-               LIMIT %s""",
-            (symbol, limit)
-        )
-    else:
-        cursor.execute(
-            """SELECT id, symbol, prediction_date, predicted_movement, confidence, actual_movement
-               FROM prediction_history 
-               ORDER BY prediction_date DESC
-               LIMIT %s""",
-            (limit,)
-        )
+    with db_connection() as conn:
+        if conn is None:
+            return []
+        
+        cursor = conn.cursor()
+        
+        if symbol:
+            cursor.execute(
+                """SELECT id, symbol, prediction_date, predicted_movement, confidence, actual_movement
+                   FROM prediction_history 
+                   WHERE symbol = %s
+                   ORDER BY prediction_date DESC
+                   LIMIT %s""",
+                (symbol, limit)
+            )
+        else:
+            cursor.execute(
+                """SELECT id, symbol, prediction_date, predicted_movement, confidence, actual_movement
+                   FROM prediction_history 
+                   ORDER BY prediction_date DESC
+                   LIMIT %s""",
+                (limit,)
+            )
+        rows = cursor.fetchall()
     
     predictions = []
-    for row in cursor.fetchall():
+    for row in rows:
         predictions.append({
             "id": row[0],
             "symbol": row[1],
@@ -275,7 +767,6 @@ def get_prediction_history(symbol: Optional[str] = None, limit: int = 100) -> Li
             "actual_movement": row[5]
         })
     
-    conn.close()
     return predictions
 
 def save_portfolio_simulation(
@@ -302,90 +793,132 @@ def save_portfolio_simulation(
     Returns:
         bool: True if successful, False otherwise
     """
-    conn = connect_db()
-    if conn is None:
-        return False
+    with db_connection() as conn:
+        if conn is None:
+            return False
+        
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute(
+                """INSERT INTO portfolio_simulation 
+                   (start_date, end_date, initial_balance, final_balance, roi, trades, strategy) 
+                   VALUES (%s, %s, %s, %s, %s, %s, %s)""",
+                (
+                    start_date,
+                    end_date,
+                    initial_balance,
+                    final_balance,
+                    roi,
+                    json.dumps(trades),
+                    strategy
+                )
+            )
+            conn.commit()
+            return True
+        except Exception as e:
+            print(f"Error saving portfolio simulation: {e}")
+            return False
+
+def _resolve_movements_from_prices(conn, cutoff: datetime) -> int:
+    """
+    Resolve pending predictions against stored closes with one UPDATE
     
-    cursor = conn.cursor()
+    A prediction is resolved when stock_prices holds a bar for its prediction
+    day and for the following calendar day.
+    
+    Args:
+        conn: Open database connection
+        cutoff: Only resolve predictions made before this time
     
+    Returns:
+        int: Number of predictions updated
+    """
+    cursor = conn.cursor()
     try:
         cursor.execute(
-            """INSERT INTO portfolio_simulation 
-               (start_date, end_date, initial_balance, final_balance, roi, trades, strategy) 
-               VALUES (%s, %s, %s, %s, %s, %s, %s)""",
-            (
-                start_date,
-                end_date,
-                initial_balance,
-                final_balance,
-                roi,
-                json.dumps(trades),
-                strategy
-            )
+            """UPDATE prediction_history ph
+               SET actual_movement = next_bar.close_price > pred_bar.close_price
+               FROM stock_prices pred_bar, stock_prices next_bar
+               WHERE ph.actual_movement IS NULL
+                 AND ph.prediction_date < %(cutoff)s
+                 AND pred_bar.symbol = ph.symbol
+                 AND pred_bar.date >= date_trunc('day', ph.prediction_date)
+                 AND pred_bar.date < date_trunc('day', ph.prediction_date) + interval '1 day'
+                 AND next_bar.symbol = ph.symbol
+                 AND next_bar.date >= date_trunc('day', ph.prediction_date) + interval '1 day'
+                 AND next_bar.date < date_trunc('day', ph.prediction_date) + interval '2 days'""",
+            {"cutoff": cutoff}
         )
+        updated = cursor.rowcount
         conn.commit()
-        conn.close()
-        return True
-    except Exception as e:
-        print(f"Error saving portfolio simulation: {e}")
-        conn.close()
-        return False
+        return updated
+    except Exception:
+        conn.rollback()
+        raise
+
+def _symbols_missing_bars(conn, cutoff: datetime) -> List[str]:
+    """
+    Find symbols with pending predictions whose next-day bar is newer than
+    the latest stored bar, i.e. that a market data refresh could resolve
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT ph.symbol
+           FROM prediction_history ph
+           LEFT JOIN (
+               SELECT symbol, MAX(date) AS latest_date
+               FROM stock_prices
+               GROUP BY symbol
+           ) stored ON stored.symbol = ph.symbol
+           WHERE ph.actual_movement IS NULL
+             AND ph.prediction_date < %(cutoff)s
+             AND (stored.latest_date IS NULL
+                  OR stored.latest_date < date_trunc('day', ph.prediction_date) + interval '1 day')
+           GROUP BY ph.symbol
+           ORDER BY ph.symbol""",
+        {"cutoff": cutoff}
+    )
+    return [row[0] for row in cursor.fetchall()]
 
 def update_actual_movements() -> int:
     """
     Update actual price movements for predictions
     
+    Pending predictions are resolved against stored closes in a single
+    set-based UPDATE. Symbols whose next-day bars are not stored yet get one
+    incremental market data fetch each, after which the UPDATE is rerun.
+    
     Returns:
         int: Number of predictions updated
     """
-    from datetime import timedelta
-    from data.stock_data import get_external_stock_data
+    from data.stock_data import fetch_stock_data
     
-    conn = connect_db()
-    if conn is None:
-        return 0
-    
-    cursor = conn.cursor()
-    
-    # Get predictions that need updating (1+ day old and actual_movement is NULL)
-    yesterday = datetime.now() - timedelta(days=1)
-    cursor.execute(
-        """SELECT id, symbol, prediction_date 
-           FROM prediction_history 
-           WHERE actual_movement IS NULL AND prediction_date < %s""",
-        (yesterday,)
-    )
-    
-    predictions_to_update = cursor.fetchall()
-    updated_count = 0
-    
-    for pred_id, symbol, pred_date in predictions_to_update:
-        # Get actual stock data for the day after prediction
-        next_day = pred_date + timedelta(days=1)
-        
-        df = get_external_stock_data(symbol, period="5d")
-        if df is None:
-            continue
-            
-        # Find the row for the prediction date and next day
-        df['date'] = pd.to_datetime(df['date'])
-        pred_row = df[df['date'].dt.date == pred_date.date()]
-        next_row = df[df['date'].dt.date == next_day.date()]
-        
-        if len(pred_row) == 0 or len(next_row) == 0:
-            continue
+    # Only predictions at least one day old can have a next-day close
+    cutoff = datetime.now() - timedelta(days=1)
+    with db_connection() as conn:
+        if conn is None:
+            return 0
         
-        # Determine actual movement
-        actual_movement = bool(next_row.iloc[0]['close_price'] > pred_row.iloc[0]['close_price'])
+        try:
+            updated = _resolve_movements_from_prices(conn, cutoff)
+            missing = _symbols_missing_bars(conn, cutoff)
+        except Exception as e:
+            print(f"Error updating actual movements: {e}")
+            return 0
+    
+    # Fetch without holding a pooled connection during market data requests
+    fetched = [symbol for symbol in missing if fetch_stock_data(symbol)]
+    if not fetched:
+        return updated
+    
+    with db_connection() as conn:
+        if conn is None:
+            return updated
         
-        # Update database
-        cursor.execute(
-            "UPDATE prediction_history SET actual_movement = %s WHERE id = %s",
-            (actual_movement, pred_id)
-        )
-        updated_count += 1
-    
-    conn.commit()
-    conn.close()
+        try:
+            updated += _resolve_movements_from_prices(conn, cutoff)
+        except Exception as e:
+            print(f"Error updating actual movements: {e}")
     
-    return updated_count
\ No newline at end of file
+    return updated
@@ -0,0 +1,362 @@
+# data/feature_store.py
+"""
+Precomputed engineered features persisted alongside stock_prices
+
+Features are stored per (symbol, date, feature-set version) in the
+stock_features table. Training, portfolio simulation and live prediction all
+read prices and features from here instead of recomputing add_features on
+every call. Rows missing for the current version (new bars, bars rewritten by
+write_stock_prices, or a changed feature list) are recomputed and persisted
+on the next read; bars appended after stored ones are computed incrementally
+from the rolling state of the preceding bars. refresh_features keeps that
+state with the frame of each symbol, so a daily update only reads and
+computes the bars written since the previous one.
+"""
+import copy
+import numpy as np
+import pandas as pd
+from psycopg2.extras import execute_values
+from typing import Optional, Dict, Any, List, Tuple
+from datetime import datetime
+
+from data.database import db_connection
+from ml.features import ENGINEERED_FEATURES, add_features, get_feature_set_version
+from ml.incremental_features import BOOTSTRAP_ROWS, IncrementalFeatureEngine, extend_features
+from utils.cache import LRUCache
+from config import PRICE_CACHE_TTL, PRICE_CACHE_MAX_SYMBOLS
+
+# Price + feature frames per (symbol, feature version). Invalidated together
+# with the price cache when bars are written; the TTL bounds staleness for
+# other processes.
+_feature_cache = LRUCache(max_entries=PRICE_CACHE_MAX_SYMBOLS, ttl=PRICE_CACHE_TTL)
+
+# (frame, engine) per (symbol, feature version) for refresh_features, where
+# engine holds the rolling state through the second to last row of frame
+# (the last bar may be rewritten by the next incremental fetch). Not dropped
+# by invalidate_features: refresh_features checks it against the database.
+_feature_states = LRUCache(max_entries=PRICE_CACHE_MAX_SYMBOLS)
+
+def invalidate_features(symbol: Optional[str] = None) -> None:
+    """
+    Drop cached feature frames for a symbol (all symbols if None)
+    """
+    _feature_cache.invalidate(None if symbol is None else (lambda key: key[0] == symbol))
+
+def get_feature_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss counters for the feature frame cache
+    """
+    return _feature_cache.stats()
+
+def _read_feature_frame(conn, symbols: List[str], version: str) -> pd.DataFrame:
+    """
+    Read all bars of the symbols with their stored feature values (NULL if missing)
+    """
+    return pd.read_sql(
+        """SELECT p.*, f.feature_values
+           FROM stock_prices p
+           LEFT JOIN stock_features f
+             ON f.symbol = p.symbol AND f.date = p.date AND f.feature_version = %(version)s
+           WHERE p.symbol = ANY(%(symbols)s)
+           ORDER BY p.symbol, p.date""",
+        conn,
+        params={"symbols": list(symbols), "version": version}
+    )
+
+def _with_stored_features(df: pd.DataFrame, stored: pd.Series) -> pd.DataFrame:
+    """
+    Expand stored feature arrays into ENGINEERED_FEATURES columns
+    """
+    values = pd.DataFrame(
+        np.array(stored.tolist(), dtype=float).reshape(len(stored), len(ENGINEERED_FEATURES)),
+        columns=ENGINEERED_FEATURES,
+        index=df.index
+    )
+    return pd.concat([df, values], axis=1)
+
+def _write_features(conn, symbol: str, version: str, frame: pd.DataFrame) -> int:
+    """
+    Upsert feature rows for a symbol and drop rows of other feature versions
+    
+    Args:
+        conn: Open database connection
+        symbol: Stock symbol
+        version: Feature-set version
+        frame: Rows to store, with a date column and ENGINEERED_FEATURES
+    
+    Returns:
+        int: Number of rows written
+    """
+    values = frame[ENGINEERED_FEATURES].to_numpy(dtype=float)
+    rows = [
+        (symbol, date.to_pydatetime(), version, row.tolist())
+        for date, row in zip(pd.to_datetime(frame["date"]), values)
+    ]
+    
+    cursor = conn.cursor()
+    try:
+        execute_values(
+            cursor,
+            """INSERT INTO stock_features (symbol, date, feature_version, feature_values) VALUES %s
+               ON CONFLICT (symbol, feature_version, date) DO UPDATE
+               SET feature_values = EXCLUDED.feature_values, computed_at = now()""",
+            rows,
+            page_size=1000
+        )
+        cursor.execute(
+            "DELETE FROM stock_features WHERE symbol = %s AND feature_version <> %s",
+            (symbol, version)
+        )
+        conn.commit()
+        return len(rows)
+    except Exception:
+        conn.rollback()
+        raise
+
+def _load_features(symbol: str, version: str) -> Optional[pd.DataFrame]:
+    """
+    Load prices with features from the store, filling in missing rows
+    """
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        
+        df = _read_feature_frame(conn, [symbol], version)
+        if df.empty:
+            return None
+        return _complete_features(conn, symbol, version, df)
+
+def _complete_features(conn, symbol: str, version: str, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Turn a frame read by _read_feature_frame into prices plus feature columns,
+    computing and persisting the rows the store is missing
+    """
+    stored = df.pop("feature_values")
+    missing = stored.isna()
+    if not missing.any():
+        return _with_stored_features(df, stored)
+    
+    first_missing = int(missing.values.argmax())
+    if first_missing >= BOOTSTRAP_ROWS and missing.iloc[first_missing:].all():
+        # Only new bars at the end: continue the rolling state from the
+        # stored history instead of recomputing it
+        known = _with_stored_features(df.iloc[:first_missing], stored.iloc[:first_missing])
+        df = pd.concat([known, extend_features(known, df.iloc[first_missing:])])
+    else:
+        # Rolling windows need the preceding bars, so recompute over the
+        # full history and persist only the rows the store is missing
+        df = add_features(df)
+    try:
+        written = _write_features(conn, symbol, version, df[missing.values])
+        print(f"Stored {written} feature rows for {symbol} (version {version}).")
+    except Exception as e:
+        print(f"Error storing features for {symbol}: {e}")
+    return df
+
+def append_bars(
+    frame: pd.DataFrame,
+    engine: IncrementalFeatureEngine,
+    new_bars: pd.DataFrame
+) -> Tuple[pd.DataFrame, pd.DataFrame, IncrementalFeatureEngine]:
+    """
+    Replace the last row of a feature frame and append bars after it
+    
+    Args:
+        frame: Prices with features, ordered by date
+        engine: Rolling state through the second to last row of frame (not modified)
+        new_bars: Bars from the date of the last row of frame onward
+    
+    Returns:
+        The extended frame, the rows computed for new_bars and the rolling
+        state through the second to last row of the extended frame
+    """
+    engine = copy.deepcopy(engine)
+    bars = new_bars.to_dict("records")
+    rows = []
+    for bar in bars[:-1]:
+        rows.append(engine.update(bar))
+    before_last = copy.deepcopy(engine)
+    rows.append(engine.update(bars[-1]))
+    
+    computed = pd.concat(
+        [new_bars, pd.DataFrame(rows, columns=ENGINEERED_FEATURES, index=new_bars.index)],
+        axis=1
+    )
+    # Only the cached columns are copied here, nothing is recomputed
+    extended = pd.concat([frame.iloc[:-1], computed], ignore_index=True)
+    return extended, computed, before_last
+
+def _extend_stored_features(
+    symbol: str,
+    version: str,
+    frame: pd.DataFrame,
+    engine: IncrementalFeatureEngine
+) -> Optional[Tuple[pd.DataFrame, IncrementalFeatureEngine]]:
+    """
+    Continue a kept frame with the bars stored from its last date onward
+    
+    Returns:
+        Extended frame and its rolling state, or None if the bars before the
+        last date no longer match the frame (it then has to be reloaded)
+    """
+    last_date = pd.Timestamp(frame["date"].iloc[-1]).to_pydatetime()
+    with db_connection() as conn:
+        if conn is None:
+            return None
+        
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT COUNT(*) FROM stock_prices WHERE symbol = %s AND date < %s",
+            (symbol, last_date)
+        )
+        if cursor.fetchone()[0] != len(frame) - 1:
+            return None
+        
+        new_bars = pd.read_sql(
+            "SELECT * FROM stock_prices WHERE symbol = %(symbol)s AND date >= %(since)s ORDER BY date",
+            conn,
+            params={"symbol": symbol, "since": last_date}
+        )
+        if new_bars.empty:
+            return None
+        
+        df, computed, before_last = append_bars(frame, engine, new_bars)
+        try:
+            written = _write_features(conn, symbol, version, computed)
+            print(f"Stored {written} feature rows for {symbol} (version {version}).")
+        except Exception as e:
+            print(f"Error storing features for {symbol}: {e}")
+    return df, before_last
+
+def refresh_features(symbol: str, since: Optional[datetime] = None) -> bool:
+    """
+    Bring the stored features of a symbol up to date with its bars
+    
+    When only bars from the last known date onward were written (the usual
+    incremental fetch), the kept rolling state is continued for them;
+    otherwise the frame is reloaded from the feature store.
+    
+    Args:
+        symbol: Stock symbol
+        since: Earliest bar date written since the previous refresh (None
+            if unknown, which forces a reload)
+    
+    Returns:
+        bool: True if the symbol has stored features, False otherwise
+    """
+    version = get_feature_set_version()
+    key = (symbol, version)
+    generation = _feature_cache.generation()
+    
+    state = _feature_states.get(key) if since is not None else None
+    extended = None
+    if state is not None and pd.Timestamp(since) >= state[0]["date"].iloc[-1]:
+        try:
+            extended = _extend_stored_features(symbol, version, *state)
+        except Exception as e:
+            print(f"Error extending features for {symbol}: {e}")
+    
+    if extended is not None:
+        df, engine = extended
+        _feature_cache.put_if_current(key, df, generation)
+    else:
+        invalidate_features(symbol)
+        try:
+            df = _feature_cache.get_or_compute(key, lambda: _load_features(symbol, version))
+        except Exception as e:
+            print(f"Error retrieving features for {symbol}: {e}")
+            df = None
+        if df is None or len(df) < 2:
+            _feature_states.invalidate(lambda k: k == key)
+            return df is not None
+        engine = IncrementalFeatureEngine.from_history(df.iloc[:-1])
+    
+    _feature_states.put(key, (df, engine))
+    return True
+
+def get_feature_data(
+    symbol: str,
+    limit: Optional[int] = None,
+    period: str = "2y"
+) -> Optional[pd.DataFrame]:
+    """
+    Get stock data with engineered features
+    
+    Stored bars are read with their features from the feature store; symbols
+    with no stored bars fall back to the market data provider and have their
+    features computed in memory.
+    
+    Args:
+        symbol: Stock symbol
+        limit: Only return the most recent rows
+        period: Time period for the market data provider (if needed)
+    
+    Returns:
+        DataFrame ordered by date with ENGINEERED_FEATURES columns or None
+    """
+    version = get_feature_set_version()
+    try:
+        df = _feature_cache.get_or_compute((symbol, version), lambda: _load_features(symbol, version))
+    except Exception as e:
+        print(f"Error retrieving features for {symbol}: {e}")
+        df = None
+    
+    if df is None:
+        from data.stock_data import get_data
+        prices = get_data(symbol, from_db=False, period=period)
+        if prices is None or prices.empty:
+            return None
+        df = add_features(prices)
+    
+    return _select_rows(df, limit)
+
+def get_feature_data_many(symbols: List[str], limit: Optional[int] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Get stock data with engineered features for several symbols
+    
+    Symbols already in the feature cache are served from it; the rest are
+    read from the feature store with a single query and cached, unless the
+    cache was invalidated (by a write) while they were being read.
+    
+    Args:
+        symbols: Stock symbols
+        limit: Only return the most recent rows of each symbol
+    
+    Returns:
+        Dictionary mapping each symbol with stored bars to its DataFrame
+    """
+    version = get_feature_set_version()
+    frames = {}
+    missing = []
+    for symbol in symbols:
+        df = _feature_cache.get((symbol, version))
+        if df is None:
+            missing.append(symbol)
+        else:
+            frames[symbol] = df
+    
+    if missing:
+        generation = _feature_cache.generation()
+        try:
+            with db_connection() as conn:
+                if conn is not None:
+                    loaded = _read_feature_frame(conn, missing, version)
+                    for symbol, df in loaded.groupby("symbol", sort=False):
+                        df = _complete_features(conn, symbol, version, df.reset_index(drop=True))
+                        _feature_cache.put_if_current((symbol, version), df, generation)
+                        frames[symbol] = df
+        except Exception as e:
+            print(f"Error retrieving features for {', '.join(missing)}: {e}")
+    
+    return {symbol: _select_rows(frames[symbol], limit) for symbol in symbols if symbol in frames}
+
+def _select_rows(df: pd.DataFrame, limit: Optional[int]) -> pd.DataFrame:
+    """
+    Copy the most recent rows of a cached frame for a caller
+    """
+    if limit is not None:
+        df = df.tail(limit)
+    # Callers are free to modify the frame they get back
+    df = df.copy()
+    df.index = pd.RangeIndex(len(df))
+    return df
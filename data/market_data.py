@@ -0,0 +1,245 @@
+# data/market_data.py
+"""
+Market data providers used for external price history
+
+All providers return yfinance-shaped frames (Date, Open, High, Low, Close,
+Volume columns, Date as a column rather than the index):
+
+- YFinanceProvider downloads from Yahoo Finance
+- LocalFileProvider reads <symbol>.csv / <symbol>.parquet files from a
+  directory, so tests and benchmarks run without network access
+- CachedProvider wraps another provider with an on-disk SQLite cache keyed
+  by symbol and requested range, and coalesces concurrent identical fetches
+
+get_market_data_provider() builds the provider configured in config.py.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from typing import Dict, Optional, Tuple
+
+import pandas as pd
+import yfinance as yf
+
+from config import (
+    MARKET_DATA_PROVIDER, MARKET_DATA_DIR, MARKET_DATA_CACHE_PATH, MARKET_DATA_CACHE_TTL
+)
+
+class MarketDataProvider(ABC):
+    """
+    Interface for daily price history sources
+    """
+    
+    @abstractmethod
+    def history(
+        self, 
+        symbol: str, 
+        period: Optional[str] = None, 
+        start: Optional[str] = None,
+        fresh: bool = False
+    ) -> pd.DataFrame:
+        """
+        Get daily bars for a symbol
+        
+        Args:
+            symbol: Stock symbol
+            period: yfinance-style period ("60d", "3mo", "2y", ...)
+            start: First date to include (YYYY-MM-DD); takes precedence over period
+            fresh: Bypass any cache and fetch from the source
+            
+        Returns:
+            DataFrame with Date, Open, High, Low, Close, Volume columns
+            (empty if no data is available)
+        """
+
+class YFinanceProvider(MarketDataProvider):
+    """
+    Price history from Yahoo Finance via yfinance
+    """
+    
+    def history(self, symbol, period=None, start=None, fresh=False):
+        stock = yf.Ticker(symbol)
+        if start is not None:
+            df = stock.history(start=start)
+        else:
+            df = stock.history(period=period or "1mo")
+        return df.reset_index()
+
+def _period_offset(period: str) -> Optional[pd.DateOffset]:
+    """
+    Convert a yfinance period string into a DateOffset (None for "max")
+    """
+    units = [("mo", "months"), ("wk", "weeks"), ("d", "days"), ("y", "years")]
+    for suffix, unit in units:
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return pd.DateOffset(**{unit: int(period[:-len(suffix)])})
+    return None
+
+class LocalFileProvider(MarketDataProvider):
+    """
+    Price history from local CSV or Parquet files, one file per symbol
+    
+    Periods are measured back from the last bar in the file rather than from
+    today, so results are stable for fixtures recorded in the past.
+    """
+    
+    def __init__(self, directory: str):
+        self.directory = directory
+    
+    def _read(self, symbol: str) -> pd.DataFrame:
+        parquet_path = os.path.join(self.directory, f"{symbol}.parquet")
+        csv_path = os.path.join(self.directory, f"{symbol}.csv")
+        if os.path.exists(parquet_path):
+            df = pd.read_parquet(parquet_path)
+        elif os.path.exists(csv_path):
+            df = pd.read_csv(csv_path)
+        else:
+            return pd.DataFrame(columns=["Date", "Open", "High", "Low", "Close", "Volume"])
+        
+        df["Date"] = pd.to_datetime(df["Date"])
+        return df.sort_values("Date").reset_index(drop=True)
+    
+    def history(self, symbol, period=None, start=None, fresh=False):
+        df = self._read(symbol)
+        if df.empty:
+            return df
+        
+        if start is not None:
+            start_date = pd.Timestamp(start)
+            if df["Date"].dt.tz is not None:
+                start_date = start_date.tz_localize(df["Date"].dt.tz)
+            return df[df["Date"] >= start_date].reset_index(drop=True)
+        
+        offset = _period_offset(period or "1mo")
+        if offset is None:
+            return df
+        return df[df["Date"] > df["Date"].iloc[-1] - offset].reset_index(drop=True)
+
+class CachedProvider(MarketDataProvider):
+    """
+    On-disk cache in front of another provider
+    
+    Results are stored in a SQLite file keyed by (symbol, period, start) and
+    reused for ttl seconds. Concurrent requests for the same key share one
+    upstream fetch. Empty results and fresh=True fetches are not cached (the
+    latter never read the cache and their start date moves with every
+    update); expired rows are pruned whenever a result is stored, so the
+    file stays bounded.
+    """
+    
+    def __init__(self, inner: MarketDataProvider, path: str, ttl: float):
+        self.inner = inner
+        self.path = path
+        self.ttl = ttl
+        self._inflight: Dict[Tuple, Future] = {}
+        self._lock = threading.Lock()
+        
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS market_data_cache (
+                    symbol TEXT NOT NULL,
+                    period TEXT NOT NULL,
+                    start TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    payload BLOB NOT NULL,
+                    PRIMARY KEY (symbol, period, start)
+                )
+            """)
+    
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path, timeout=30)
+    
+    def _load(self, key: Tuple) -> Optional[pd.DataFrame]:
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT fetched_at, payload FROM market_data_cache WHERE symbol = ? AND period = ? AND start = ?",
+                key
+            ).fetchone()
+        if row is None or time.time() - row[0] > self.ttl:
+            return None
+        return pickle.loads(row[1])
+    
+    def _store(self, key: Tuple, df: pd.DataFrame) -> None:
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("DELETE FROM market_data_cache WHERE fetched_at < ?", (now - self.ttl,))
+            conn.execute(
+                """INSERT OR REPLACE INTO market_data_cache (symbol, period, start, fetched_at, payload)
+                   VALUES (?, ?, ?, ?, ?)""",
+                key + (now, pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+            )
+    
+    def history(self, symbol, period=None, start=None, fresh=False):
+        key = (symbol, period or "", start or "")
+        
+        if not fresh:
+            try:
+                cached = self._load(key)
+            except Exception as e:
+                print(f"Market data cache read failed: {e}")
+                cached = None
+            if cached is not None:
+                return cached.copy()
+        
+        # Coalesce concurrent fetches of the same range into one upstream call
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not owner:
+            return future.result().copy()
+        
+        try:
+            df = self.inner.history(symbol, period=period, start=start, fresh=fresh)
+            if not fresh and not df.empty:
+                try:
+                    self._store(key, df)
+                except Exception as e:
+                    print(f"Market data cache write failed: {e}")
+            future.set_result(df)
+            return df.copy()
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+_provider: Optional[MarketDataProvider] = None
+_provider_lock = threading.Lock()
+
+def get_market_data_provider() -> MarketDataProvider:
+    """
+    Get the process-wide market data provider configured in config.py
+    """
+    global _provider
+    
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                if MARKET_DATA_PROVIDER == "local":
+                    provider = LocalFileProvider(MARKET_DATA_DIR)
+                else:
+                    provider = YFinanceProvider()
+                if MARKET_DATA_CACHE_PATH:
+                    provider = CachedProvider(provider, MARKET_DATA_CACHE_PATH, MARKET_DATA_CACHE_TTL)
+                _provider = provider
+    return _provider
+
+def set_market_data_provider(provider: MarketDataProvider) -> None:
+    """
+    Replace the process-wide provider (e.g. with a LocalFileProvider in tests)
+    """
+    global _provider
+    _provider = provider
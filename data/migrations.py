@@ -0,0 +1,168 @@
+# data/migrations.py
+"""
+Versioned schema migrations for the AI Trading Platform database
+
+Each migration is applied once, in order, inside its own transaction and
+recorded in the schema_migrations table. Existing data is never dropped, so
+restarts keep stored prices and predictions. To change the schema, append a
+new entry to MIGRATIONS; never edit one that has already shipped.
+"""
+from typing import List, Tuple
+
+# Arbitrary key for the advisory lock that serialises concurrent migrators
+_MIGRATION_LOCK_ID = 720_431_001
+
+# (version, description, statements)
+MIGRATIONS: List[Tuple[int, str, List[str]]] = [
+    (1, "initial schema", [
+        """CREATE TABLE IF NOT EXISTS stock_prices (
+            id SERIAL PRIMARY KEY,
+            symbol VARCHAR(10),
+            date TIMESTAMP,
+            open_price FLOAT,
+            close_price FLOAT,
+            high_price FLOAT,
+            low_price FLOAT,
+            volume INT,
+            adjusted_close FLOAT
+        )""",
+        """CREATE TABLE IF NOT EXISTS prediction_history (
+            id SERIAL PRIMARY KEY,
+            symbol VARCHAR(10),
+            prediction_date TIMESTAMP,
+            predicted_movement BOOLEAN,
+            confidence FLOAT,
+            actual_movement BOOLEAN NULL,
+            features JSON
+        )""",
+        """CREATE TABLE IF NOT EXISTS portfolio_simulation (
+            id SERIAL PRIMARY KEY,
+            start_date TIMESTAMP,
+            end_date TIMESTAMP,
+            initial_balance FLOAT,
+            final_balance FLOAT,
+            roi FLOAT,
+            trades JSON,
+            strategy VARCHAR(50)
+        )"""
+    ]),
+    (2, "unique (symbol, date) key on stock_prices", [
+        "DELETE FROM stock_prices WHERE symbol IS NULL OR date IS NULL",
+        # Bars used to be inserted as tz-aware exchange timestamps, which the
+        # TIMESTAMP column stored converted to the session time zone (e.g.
+        # 05:00 under UTC). Bars are now stored as the naive exchange-local
+        # day, so move those rows to the exchange-local midnight they stand
+        # for; otherwise the next sync inserts a second bar for the same day.
+        """UPDATE stock_prices
+           SET date = date_trunc('day', (date AT TIME ZONE current_setting('TimeZone'))
+                                        AT TIME ZONE 'America/New_York')
+           WHERE date <> date_trunc('day', date)""",
+        # Keep the most recently inserted bar when a date was stored twice
+        """DELETE FROM stock_prices a USING stock_prices b
+           WHERE a.symbol = b.symbol AND a.date = b.date AND a.id < b.id""",
+        "ALTER TABLE stock_prices ALTER COLUMN symbol SET NOT NULL",
+        "ALTER TABLE stock_prices ALTER COLUMN date SET NOT NULL",
+        """CREATE UNIQUE INDEX IF NOT EXISTS stock_prices_symbol_date_key
+           ON stock_prices (symbol, date)"""
+    ]),
+    (3, "prediction_history constraints and indexes", [
+        """DELETE FROM prediction_history
+           WHERE symbol IS NULL OR prediction_date IS NULL OR predicted_movement IS NULL""",
+        "ALTER TABLE prediction_history ALTER COLUMN symbol SET NOT NULL",
+        "ALTER TABLE prediction_history ALTER COLUMN prediction_date SET NOT NULL",
+        "ALTER TABLE prediction_history ALTER COLUMN predicted_movement SET NOT NULL",
+        """ALTER TABLE prediction_history ADD CONSTRAINT prediction_history_confidence_check
+           CHECK (confidence BETWEEN 0 AND 1) NOT VALID""",
+        """CREATE INDEX IF NOT EXISTS idx_prediction_history_symbol_date
+           ON prediction_history (symbol, prediction_date DESC)""",
+        """CREATE INDEX IF NOT EXISTS idx_prediction_history_date
+           ON prediction_history (prediction_date DESC)""",
+        """CREATE INDEX IF NOT EXISTS idx_prediction_history_unresolved
+           ON prediction_history (prediction_date)
+           WHERE actual_movement IS NULL"""
+    ]),
+    (4, "stock_features feature store", [
+        # One row per bar and feature-set version; values follow
+        # ml.features.ENGINEERED_FEATURES order for that version
+        """CREATE TABLE IF NOT EXISTS stock_features (
+            symbol VARCHAR(10) NOT NULL,
+            date TIMESTAMP NOT NULL,
+            feature_version VARCHAR(16) NOT NULL,
+            feature_values DOUBLE PRECISION[] NOT NULL,
+            computed_at TIMESTAMP NOT NULL DEFAULT now(),
+            PRIMARY KEY (symbol, feature_version, date)
+        )"""
+    ]),
+    (5, "prediction_history dedup key", [
+        "ALTER TABLE prediction_history ADD COLUMN IF NOT EXISTS model_version VARCHAR(32)",
+        "ALTER TABLE prediction_history ADD COLUMN IF NOT EXISTS bar_date TIMESTAMP",
+        # One stored prediction per model and latest bar; rows from before
+        # this migration have NULLs and are not affected
+        """CREATE UNIQUE INDEX IF NOT EXISTS prediction_history_dedup_key
+           ON prediction_history (symbol, model_version, bar_date)"""
+    ])
+]
+
+def get_schema_version(conn) -> int:
+    """
+    Get the highest applied migration version
+    
+    Args:
+        conn: Open database connection
+        
+    Returns:
+        Current schema version (0 for an empty database)
+    """
+    cursor = conn.cursor()
+    cursor.execute("SELECT to_regclass('schema_migrations')")
+    if cursor.fetchone()[0] is None:
+        return 0
+    cursor.execute("SELECT COALESCE(MAX(version), 0) FROM schema_migrations")
+    return cursor.fetchone()[0]
+
+def apply_migrations(conn) -> int:
+    """
+    Apply all pending migrations
+    
+    Args:
+        conn: Open database connection
+        
+    Returns:
+        Number of migrations applied
+    """
+    cursor = conn.cursor()
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            version INT PRIMARY KEY,
+            description TEXT NOT NULL,
+            applied_at TIMESTAMP NOT NULL DEFAULT now()
+        )
+    """)
+    conn.commit()
+    
+    applied = 0
+    for version, description, statements in MIGRATIONS:
+        # Hold the lock for the whole transaction so parallel workers wait
+        # for each other instead of applying the same migration twice
+        cursor.execute("SELECT pg_advisory_xact_lock(%s)", (_MIGRATION_LOCK_ID,))
+        cursor.execute("SELECT 1 FROM schema_migrations WHERE version = %s", (version,))
+        if cursor.fetchone() is not None:
+            conn.commit()
+            continue
+        
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, description) VALUES (%s, %s)",
+                (version, description)
+            )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        print(f"Applied migration {version}: {description}")
+        applied += 1
+    
+    return applied
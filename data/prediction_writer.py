@@ -0,0 +1,250 @@
+# data/prediction_writer.py
+"""
+Write-behind queue for prediction_history inserts
+
+Predictions are queued in memory and written by a background thread with one
+multi-row INSERT per batch, so API responses do not wait for the database.
+A batch is flushed once PREDICTION_WRITE_BATCH_SIZE records are queued or
+PREDICTION_WRITE_INTERVAL seconds after its first record arrived. Failed
+writes are retried with backoff up to PREDICTION_WRITE_MAX_RETRIES times;
+when the queue is full, records are written synchronously instead.
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+from data.database import db_connection, write_predictions, save_predictions
+from config import (
+    PREDICTION_WRITE_BATCH_SIZE, PREDICTION_WRITE_INTERVAL,
+    PREDICTION_WRITE_MAX_QUEUE, PREDICTION_WRITE_MAX_RETRIES
+)
+
+# (symbol, prediction_date, predicted_movement, confidence, features,
+#  model_version, bar_date)
+PredictionRecord = Tuple[str, datetime, bool, float, Dict[str, float], str, datetime]
+
+# Delay before the first retry of a failed batch; doubles on each attempt
+_RETRY_BACKOFF = 0.5
+_MAX_RETRY_BACKOFF = 5.0
+
+class PredictionWriter:
+    """
+    Buffers prediction records and writes them in batches from a daemon thread
+    """
+    
+    def __init__(self, batch_size: int, interval: float, max_queue: int, max_retries: int):
+        self.batch_size = max(1, batch_size)
+        self.interval = interval
+        self.max_queue = max_queue
+        self.max_retries = max_retries
+        self._queue: "deque[PredictionRecord]" = deque()
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._in_flight = 0
+        self._closed = False
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "duplicates": 0,
+            "batches": 0,
+            "retries": 0,
+            "dropped": 0,
+            "overflow": 0,
+            "max_queue_depth": 0,
+            "total_flush_seconds": 0.0,
+            "max_flush_seconds": 0.0,
+            "last_flush_seconds": 0.0
+        }
+    
+    def enqueue(self, records: List[PredictionRecord]) -> bool:
+        """
+        Queue records for writing
+        
+        Args:
+            records: Prediction records
+        
+        Returns:
+            bool: True if queued, False if the writer is closed or full and
+            the caller has to write the records itself
+        """
+        with self._cond:
+            self._ensure_thread()
+            if self._closed or len(self._queue) + len(records) > self.max_queue:
+                self._stats["overflow"] += len(records)
+                return False
+            
+            self._queue.extend(records)
+            self._stats["enqueued"] += len(records)
+            self._stats["max_queue_depth"] = max(self._stats["max_queue_depth"], len(self._queue))
+            self._cond.notify_all()
+            return True
+    
+    def _ensure_thread(self) -> None:
+        """
+        Start the flush thread, again in a forked child (called with the lock held)
+        """
+        if self._closed:
+            return
+        pid = os.getpid()
+        if self._thread is not None and self._pid == pid:
+            return
+        if self._pid is not None and self._pid != pid:
+            # Records queued before the fork belong to the parent
+            self._queue.clear()
+            self._in_flight = 0
+        self._pid = pid
+        self._thread = threading.Thread(target=self._run, name="prediction-writer", daemon=True)
+        self._thread.start()
+    
+    def _next_batch(self) -> Optional[List[PredictionRecord]]:
+        """
+        Wait until a batch is due and take it off the queue (None once closed and drained)
+        """
+        with self._cond:
+            deadline = None
+            while True:
+                if not self._queue:
+                    if self._closed:
+                        return None
+                    deadline = None
+                    self._cond.wait()
+                    continue
+                if len(self._queue) >= self.batch_size or self._closed:
+                    break
+                if deadline is None:
+                    deadline = time.monotonic() + self.interval
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            
+            batch = [self._queue.popleft() for _ in range(min(self.batch_size, len(self._queue)))]
+            self._in_flight += len(batch)
+            return batch
+    
+    def _run(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            try:
+                self._write(batch)
+            finally:
+                with self._cond:
+                    self._in_flight -= len(batch)
+                    self._cond.notify_all()
+    
+    def _write(self, batch: List[PredictionRecord]) -> None:
+        """
+        Write one batch, retrying with backoff and dropping it once retries run out
+        """
+        for attempt in range(self.max_retries + 1):
+            start = time.perf_counter()
+            try:
+                with db_connection() as conn:
+                    if conn is None:
+                        raise ConnectionError("no database connection available")
+                    written = write_predictions(conn, batch)
+                self._record_flush(written, len(batch) - written, time.perf_counter() - start)
+                return
+            except Exception as e:
+                print(f"Error writing {len(batch)} predictions (attempt {attempt + 1}): {e}")
+                if attempt < self.max_retries:
+                    with self._cond:
+                        self._stats["retries"] += 1
+                    time.sleep(min(_RETRY_BACKOFF * 2 ** attempt, _MAX_RETRY_BACKOFF))
+        
+        with self._cond:
+            self._stats["dropped"] += len(batch)
+        print(f"Dropped {len(batch)} predictions after {self.max_retries + 1} failed attempts")
+    
+    def _record_flush(self, rows: int, duplicates: int, seconds: float) -> None:
+        with self._cond:
+            self._stats["written"] += rows
+            self._stats["duplicates"] += duplicates
+            self._stats["batches"] += 1
+            self._stats["total_flush_seconds"] += seconds
+            self._stats["max_flush_seconds"] = max(self._stats["max_flush_seconds"], seconds)
+            self._stats["last_flush_seconds"] = seconds
+    
+    def close(self, timeout: Optional[float] = None) -> bool:
+        """
+        Flush the queue and stop the flush thread; later records are written synchronously
+        
+        Args:
+            timeout: Maximum seconds to wait (no limit if None)
+        
+        Returns:
+            bool: True if everything queued was written or dropped in time
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            thread = self._thread if self._pid == os.getpid() else None
+        if thread is None:
+            return True
+        thread.join(timeout)
+        return not thread.is_alive()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get queue depth and flush latency metrics
+        
+        Returns:
+            Dictionary with counters and latencies in milliseconds
+        """
+        with self._cond:
+            stats = dict(self._stats)
+            queue_depth = len(self._queue)
+            in_flight = self._in_flight
+        
+        batches = stats["batches"] or 1
+        return {
+            "queue_depth": queue_depth,
+            "in_flight": in_flight,
+            "max_queue_depth": stats["max_queue_depth"],
+            "enqueued": stats["enqueued"],
+            "written": stats["written"],
+            "duplicates": stats["duplicates"],
+            "batches": stats["batches"],
+            "retries": stats["retries"],
+            "dropped": stats["dropped"],
+            "overflow": stats["overflow"],
+            "avg_flush_ms": stats["total_flush_seconds"] / batches * 1000,
+            "max_flush_ms": stats["max_flush_seconds"] * 1000,
+            "last_flush_ms": stats["last_flush_seconds"] * 1000
+        }
+
+_writer = PredictionWriter(
+    PREDICTION_WRITE_BATCH_SIZE,
+    PREDICTION_WRITE_INTERVAL,
+    PREDICTION_WRITE_MAX_QUEUE,
+    PREDICTION_WRITE_MAX_RETRIES
+)
+
+def enqueue_predictions(records: List[PredictionRecord]) -> None:
+    """
+    Store predictions in the background, or synchronously if the queue is full
+    
+    Args:
+        records: (symbol, prediction_date, predicted_movement, confidence,
+            features, model_version, bar_date) tuples
+    """
+    if records and not _writer.enqueue(records):
+        save_predictions(records)
+
+def close_prediction_writer(timeout: Optional[float] = None) -> bool:
+    """
+    Drain the queue and stop the writer (called on application shutdown)
+    """
+    return _writer.close(timeout)
+
+def get_prediction_writer_stats() -> Dict[str, Any]:
+    """
+    Get queue depth and flush latency metrics for the prediction writer
+    """
+    return _writer.stats()
@@ -2,74 +2,112 @@
 """
 Stock data fetching and processing functionality
 """
-import yfinance as yf
 import pandas as pd
 from typing import Optional, Dict, Any, Union, List
+from datetime import datetime
+import json
 import numpy as np
 
-from data.database import get_stock_data, save_stock_data, connect_db
+try:
+    import orjson
+except ImportError:  # optional fast JSON encoder
+    orjson = None
 
-def fetch_stock_data(symbol="AAPL"):
+from data.database import get_stock_data, save_stock_data, get_latest_stock_date
+from data.feature_store import get_feature_data, get_feature_data_many, refresh_features
+from data.market_data import get_market_data_provider
+
+def fetch_stock_data(symbol="AAPL", incremental: bool = True):
+    """
+    Fetch bars from the market data provider and upsert them into stock_prices
+    
+    In incremental mode only the window since the latest stored bar is
+    downloaded (the latest bar itself is refetched in case it was partial);
+    a symbol without stored data gets the full 2 year history.
+    
+    Args:
+        symbol: Stock symbol
+        incremental: Only fetch bars missing from the database
+    
+    Returns:
+        bool: True if the database is up to date, False otherwise
+    """
     try:
-        stock = yf.Ticker(symbol)
-        df = stock.history(period="2y")  # Get 2 years of data for better training
+        latest_date = get_latest_stock_date(symbol) if incremental else None
+        
+        # Always go to the source so the refresh sees today's bars
+        provider = get_market_data_provider()
+        if latest_date is None:
+            df = provider.history(symbol, period="2y", fresh=True)  # Get 2 years of data for better training
+        else:
+            df = provider.history(symbol, start=latest_date.strftime("%Y-%m-%d"), fresh=True)
+        
         if df.empty:
+            if latest_date is not None:
+                print(f"Stock data for {symbol} already up to date.")
+                return True
             print(f"No data found for symbol {symbol}")
             return False
-            
-        df.reset_index(inplace=True)
 
-        conn = connect_db()
-        if conn is None:
+        if not save_stock_data(symbol, df):
             return False
-            
-        cursor = conn.cursor()
         
-        # First clear existing data for this symbol
-        cursor.execute("DELETE FROM stock_prices WHERE symbol = %s", (symbol,))
+        print(f"Stock data for {symbol} stored in database ({len(df)} bars).")
         
-        for _, row in df.iterrows():
-            cursor.execute(
-                """INSERT INTO stock_prices 
-                   (symbol, date, open_price, close_price, high_price, low_price, volume, adjusted_close) 
-                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
-                (symbol, row["Date"], row["Open"], row["Close"], 
-                 row["High"], row["Low"], row["Volume"], 
-                 row["Close"] if "Adj Close" not in row else row["Adj Close"])
-            )
-
-        conn.commit()
-        conn.close()
-        print(f"Stock data for {symbol} stored in database.")
+        # Compute features for the new bars now rather than on the next read
+        first_date = pd.to_datetime(df["Date"]).min()
+        if first_date.tz is not None:
+            first_date = first_date.tz_localize(None)  # stored as the exchange-local date
+        refresh_features(symbol, since=first_date.to_pydatetime())
+        
+        # The latest bar may have been replaced, so cached predictions are stale
+        from ml.prediction import invalidate_predictions
+        invalidate_predictions(symbol)
         return True
     except Exception as e:
         print(f"Error fetching stock data for {symbol}: {e}")
         return False
 
-def get_data(symbol: str, from_db: bool = True, period: str = "2y") -> Optional[pd.DataFrame]:
+def get_data(
+    symbol: str, 
+    from_db: bool = True, 
+    period: str = "2y",
+    limit: Optional[int] = None,
+    columns: Optional[List[str]] = None
+) -> Optional[pd.DataFrame]:
     """
-    Get stock data from database or yfinance if not available
+    Get stock data from database or the market data provider if not available
     
     Args:
         symbol: Stock symbol
         from_db: Whether to try the database first
-        period: Time period for yfinance (if needed)
+        period: Time period for the market data provider (if needed)
+        limit: Only return the most recent rows
+        columns: Columns to return (all columns if None)
     
     Returns:
         DataFrame with stock data or None if unavailable
     """
     # Try database first if requested
     if from_db:
-        df = get_stock_data(symbol)
+        df = get_stock_data(symbol, limit=limit, columns=columns)
         if df is not None and not df.empty:
             return df
     
-    # Fallback to yfinance
-    return get_external_stock_data(symbol, period)
+    # Fallback to the market data provider
+    df = get_external_stock_data(symbol, period)
+    if df is None:
+        return None
+    if limit is not None:
+        df = df.tail(limit)
+    if columns is not None:
+        keep = list(dict.fromkeys(["date"] + list(columns)))
+        df = df[[c for c in keep if c in df.columns]]
+    return df.reset_index(drop=True)
 
 def get_external_stock_data(symbol: str, period: str = "3mo") -> Optional[pd.DataFrame]:
     """
-    Get stock data directly from yfinance with correct period format
+    Get stock data directly from the market data provider with correct period format
     """
     # Convert web API period format to yfinance format
     period_mapping = {
@@ -83,13 +121,11 @@ def get_external_stock_data(symbol: str, period: str = "3mo") -> Optional[pd.Dat
     yf_period = period_mapping.get(period, "3mo")
     
     try:
-        stock = yf.Ticker(symbol)
-        df = stock.history(period=yf_period)
+        df = get_market_data_provider().history(symbol, period=yf_period)
         
         if df.empty:
             return None
-            
-        df.reset_index(inplace=True)
+        
         df['symbol'] = symbol
         
         # Make sure column names match exactly
@@ -117,6 +153,9 @@ def get_latest_data(symbol: str) -> Optional[Dict[str, Any]]:
     """
     Get latest stock data with engineered features
     
+    The latest row is read from the feature store; the market data provider
+    is only used for symbols with no stored bars.
+    
     Args:
         symbol: Stock symbol
     
@@ -124,73 +163,157 @@ def get_latest_data(symbol: str) -> Optional[Dict[str, Any]]:
         Dictionary with latest data and features or None
     """
     try:
-        # Get enough days to calculate features
-        stock = yf.Ticker(symbol)
-        df = stock.history(period="60d")
-        
-        if df.empty:
+        df = get_feature_data(symbol, limit=1, period="3m")
+        if df is None or df.empty:
             return None
         
-        df.reset_index(inplace=True)
-        df = df.rename(columns={
-            "Date": "date", 
-            "Open": "open_price", 
-            "Close": "close_price", 
-            "High": "high_price",
-            "Low": "low_price",
-            "Volume": "volume"
-        })
-        
-        # Add features (same as in ml/features.py)
-        from ml.features import add_features
-        df = add_features(df)
-        
-        # Get the most recent data
-        latest = df.iloc[-1].to_dict()
-        
-        # Add formatted date for display
-        if isinstance(latest["date"], pd.Timestamp):
-            latest["formatted_date"] = latest["date"].strftime("%Y-%m-%d")
-        else:
-            latest["formatted_date"] = str(latest["date"])
-            
-        # Format values for display
-        for key in latest:
-            if isinstance(latest[key], (float, np.float64)):
-                latest[key] = float(latest[key])
-                
-        return latest
+        return _format_latest_row(df.drop(columns=["id"], errors="ignore"))
     except Exception as e:
         print(f"Error fetching latest data: {e}")
         return None
 
-# Add this function to data/stock_data.py or update if it exists
-def format_stock_data_for_api(df: pd.DataFrame, days: int = 90) -> List[Dict[str, Any]]:
+def get_latest_data_many(symbols: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Get latest stock data with engineered features for several symbols
+    
+    Stored symbols are read with one feature store query; symbols with no
+    stored bars fall back to get_latest_data one at a time.
+    
+    Args:
+        symbols: Stock symbols
+    
+    Returns:
+        Dictionary mapping each symbol with data to its latest row
     """
-    Format stock data for API response, with column name validation
-    """
-    data = []
-    for _, row in df.iterrows():
-        # Create item with safe column access
-        item = {
-            "date": row["date"].strftime("%Y-%m-%d") if isinstance(row["date"], pd.Timestamp) else str(row["date"]),
-            "open_price": float(row["open_price"]) if "open_price" in row else 0.0,
-            "close_price": float(row["close_price"]) if "close_price" in row else 0.0,
-            "volume": int(row["volume"]) if "volume" in row else 0
-        }
+    latest = {}
+    frames = get_feature_data_many(symbols, limit=1)
+    for symbol in symbols:
+        try:
+            if symbol in frames:
+                row = _format_latest_row(frames[symbol].drop(columns=["id"], errors="ignore"))
+            else:
+                row = get_latest_data(symbol)
+        except Exception as e:
+            print(f"Error fetching latest data for {symbol}: {e}")
+            row = None
+        if row is not None:
+            latest[symbol] = row
+    return latest
+
+def _format_latest_row(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Format the most recent row of a feature frame for prediction and display
+    """
+    # Get the most recent data
+    latest = df.iloc[-1].to_dict()
+    
+    # Add formatted date for display
+    if isinstance(latest["date"], pd.Timestamp):
+        latest["formatted_date"] = latest["date"].strftime("%Y-%m-%d")
+    else:
+        latest["formatted_date"] = str(latest["date"])
         
-        # Add optional fields if they exist
-        if "high_price" in row:
-            item["high_price"] = float(row["high_price"])
-        else:
-            item["high_price"] = item["close_price"]  # Use close price as fallback
-            
-        if "low_price" in row:
-            item["low_price"] = float(row["low_price"])
-        else:
-            item["low_price"] = item["close_price"]  # Use close price as fallback
+    # Format values for display
+    for key in latest:
+        if isinstance(latest[key], (float, np.float64)):
+            latest[key] = float(latest[key])
             
-        data.append(item)
+    return latest
+
+def format_stock_columns(df: pd.DataFrame, days: int = 90) -> Dict[str, List[Any]]:
+    """
+    Format stock data as parallel column arrays, with column name validation
+    
+    Only the most recent days rows are formatted; columns are converted in
+    bulk rather than row by row.
     
+    Args:
+        df: DataFrame with stock data
+        days: Number of most recent rows to include
+        
+    Returns:
+        Dictionary mapping each API field to its list of values
+    """
     # Keep only the most recent data based on days
-    return data[-days:]
\ No newline at end of file
+    df = df.tail(days) if days > 0 else df.iloc[0:0]
+    
+    if pd.api.types.is_datetime64_any_dtype(df["date"]):
+        dates = df["date"].dt.strftime("%Y-%m-%d").tolist()
+    else:
+        dates = [d.strftime("%Y-%m-%d") if isinstance(d, pd.Timestamp) else str(d) for d in df["date"]]
+    
+    def float_column(name: str, fallback: Optional[List[float]] = None) -> List[float]:
+        if name in df.columns:
+            return df[name].to_numpy(dtype=np.float64).tolist()
+        return fallback if fallback is not None else [0.0] * len(df)
+    
+    close_prices = float_column("close_price")
+    if "volume" in df.columns:
+        volumes = df["volume"].fillna(0).to_numpy(dtype=np.int64).tolist()
+    else:
+        volumes = [0] * len(df)
+    
+    return {
+        "date": dates,
+        "open_price": float_column("open_price"),
+        "close_price": close_prices,
+        "volume": volumes,
+        # Use close price as fallback for missing high/low
+        "high_price": float_column("high_price", close_prices),
+        "low_price": float_column("low_price", close_prices)
+    }
+
+def format_stock_data_for_api(df: pd.DataFrame, days: int = 90) -> List[Dict[str, Any]]:
+    """
+    Format stock data for API response as one dictionary per day
+    """
+    columns = format_stock_columns(df, days)
+    names = list(columns)
+    return [dict(zip(names, values)) for values in zip(*columns.values())]
+
+def serialize_stock_data(df: pd.DataFrame, days: int = 90, layout: str = "rows") -> bytes:
+    """
+    Format stock data for the API and encode it as a JSON response body
+    
+    Args:
+        df: DataFrame with stock data
+        days: Number of most recent rows to include
+        layout: "rows" for a list of per-day objects, "columnar" for an
+            object of parallel arrays
+        
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if layout == "columnar":
+        return dumps_json(format_stock_columns(df, days))
+    return dumps_json(format_stock_data_for_api(df, days))
+
+def serialize_stock_data_arrow(df: pd.DataFrame, days: int = 90) -> Optional[bytes]:
+    """
+    Encode stock data as an Arrow IPC stream with the columnar layout
+    
+    Args:
+        df: DataFrame with stock data
+        days: Number of most recent rows to include
+        
+    Returns:
+        Arrow IPC stream bytes or None if pyarrow is not installed
+    """
+    try:
+        import pyarrow as pa
+    except ImportError:
+        return None
+    
+    table = pa.table(format_stock_columns(df, days))
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+def dumps_json(value: Any) -> bytes:
+    """
+    Encode a value as JSON bytes, using orjson when it is installed
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
@@ -2,9 +2,23 @@
 """
 Feature engineering for ML models
 """
+import hashlib
 import pandas as pd
 from typing import List, Tuple, Dict, Any, Optional
 
+# Columns created by add_features, in the order they are persisted
+ENGINEERED_FEATURES = [
+    "price_change", "volatility", "ma5", "ma20", "ma50",
+    "price_rel_ma5", "price_rel_ma20", "price_rel_ma50",
+    "volume_change", "avg_volume_5d", "volume_rel_avg", "day_range"
+]
+
+# Rows at the start of a frame that lack a full set of features (longest window - 1)
+FEATURE_WARMUP_ROWS = 49
+
+# Bump when a feature definition in add_features changes
+FEATURE_REVISION = 1
+
 def add_features(df: pd.DataFrame) -> pd.DataFrame:
     """
     Add engineered features to the dataframe
@@ -42,6 +56,15 @@ def add_features(df: pd.DataFrame) -> pd.DataFrame:
     
     return df
 
+def ensure_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add engineered features unless the frame already has them
+    (e.g. because it was read from the feature store)
+    """
+    if all(col in df.columns for col in ENGINEERED_FEATURES):
+        return df
+    return add_features(df)
+
 def prepare_training_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[List[str]]]:
     """
     Prepare data for model training
@@ -53,7 +76,7 @@ def prepare_training_data(df: pd.DataFrame) -> Tuple[pd.DataFrame, Optional[List
         DataFrame with features and target, list of feature names
     """
     # Add engineered features
-    df = add_features(df)
+    df = ensure_features(df).copy()
     
     # Add target: Next day's movement (1 for up, 0 for down)
     df["target"] = (df["close_price"].shift(-1) > df["close_price"]).astype(int)
@@ -81,6 +104,19 @@ def get_feature_list() -> List[str]:
         "price_rel_ma50", "volume_change", "volume_rel_avg", "day_range"
     ]
 
+def get_feature_set_version() -> str:
+    """
+    Get the version of the persisted feature set
+    
+    Changes whenever the engineered columns, the prediction feature list or
+    FEATURE_REVISION change, so stored features are recomputed automatically.
+    
+    Returns:
+        Short version hash
+    """
+    spec = "|".join([",".join(ENGINEERED_FEATURES), ",".join(get_feature_list()), str(FEATURE_REVISION)])
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()[:12]
+
 def split_data(df: pd.DataFrame, features: List[str], target_col: str = "target") -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
     """
     Split data into training and testing sets
@@ -0,0 +1,196 @@
+# ml/incremental_features.py
+"""
+Incremental computation of the engineered features for appended bars
+
+add_features recomputes every rolling window over the whole history. When
+bars are appended one at a time, IncrementalFeatureEngine keeps the rolling
+state (ring buffers with running sums and sums of squares for the 5/20/50
+bar windows) and produces the features of each new bar in O(1).
+"""
+import math
+from typing import Dict, Any, List, Mapping
+
+import pandas as pd
+
+from ml.features import ENGINEERED_FEATURES, FEATURE_WARMUP_ROWS
+
+# Bars needed to rebuild the full rolling state (longest window plus one for
+# the pct_change feeding the volatility window)
+BOOTSTRAP_ROWS = FEATURE_WARMUP_ROWS + 1
+
+def _divide(numerator: float, denominator: float) -> float:
+    """
+    Float division with numpy/pandas semantics (x / 0 is +-inf, 0 / 0 is NaN)
+    """
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return math.nan
+        return math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+class RollingWindow:
+    """
+    Fixed-size window with running sum and sum of squares
+    
+    Matches pandas rolling(size) with the default min_periods: mean and std
+    are NaN until the window is full and while it holds a non-finite value.
+    The running sums are rebuilt from the buffer once per window length so
+    floating point error cannot accumulate.
+    """
+    
+    def __init__(self, size: int):
+        self.size = size
+        self._values: List[float] = [math.nan] * size
+        self._pos = 0
+        self._count = 0
+        self._invalid = 0
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._since_resync = 0
+    
+    def push(self, value: float) -> None:
+        """
+        Append a value, evicting the oldest one once the window is full
+        """
+        if self._count == self.size:
+            self._remove(self._values[self._pos])
+        else:
+            self._count += 1
+        
+        self._values[self._pos] = value
+        if math.isfinite(value):
+            self._sum += value
+            self._sumsq += value * value
+        else:
+            self._invalid += 1
+        self._pos = (self._pos + 1) % self.size
+        
+        self._since_resync += 1
+        if self._since_resync >= self.size:
+            self._resync()
+    
+    def _remove(self, value: float) -> None:
+        if math.isfinite(value):
+            self._sum -= value
+            self._sumsq -= value * value
+        else:
+            self._invalid -= 1
+    
+    def _resync(self) -> None:
+        finite = [v for v in self._values[:self._count] if math.isfinite(v)]
+        self._sum = math.fsum(finite)
+        self._sumsq = math.fsum(v * v for v in finite)
+        self._since_resync = 0
+    
+    @property
+    def ready(self) -> bool:
+        return self._count == self.size and self._invalid == 0
+    
+    def mean(self) -> float:
+        return self._sum / self.size if self.ready else math.nan
+    
+    def std(self) -> float:
+        """
+        Sample standard deviation (ddof=1, as pandas)
+        """
+        if not self.ready or self.size < 2:
+            return math.nan
+        variance = (self._sumsq - self._sum * self._sum / self.size) / (self.size - 1)
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+class IncrementalFeatureEngine:
+    """
+    Rolling feature state for one symbol
+    
+    Feeding bars in date order through update() yields the same values as
+    add_features over the full history (up to floating point rounding).
+    """
+    
+    def __init__(self):
+        self._close_5 = RollingWindow(5)
+        self._close_20 = RollingWindow(20)
+        self._close_50 = RollingWindow(50)
+        self._change_5 = RollingWindow(5)
+        self._volume_5 = RollingWindow(5)
+        self._prev_close = math.nan
+        self._prev_volume = math.nan
+    
+    @classmethod
+    def from_history(cls, df: pd.DataFrame) -> "IncrementalFeatureEngine":
+        """
+        Rebuild the rolling state from the most recent bars of a price history
+        
+        Args:
+            df: Price history ordered by date (only the last BOOTSTRAP_ROWS
+                rows are used)
+        
+        Returns:
+            Engine ready to compute the bar following the history
+        """
+        engine = cls()
+        for bar in df.tail(BOOTSTRAP_ROWS).to_dict("records"):
+            engine.update(bar)
+        return engine
+    
+    def update(self, bar: Mapping[str, Any]) -> Dict[str, float]:
+        """
+        Add one bar and compute its features
+        
+        Args:
+            bar: Mapping with open_price, close_price, high_price, low_price
+                and volume
+        
+        Returns:
+            Dictionary with one value per ENGINEERED_FEATURES column
+        """
+        close = float(bar["close_price"])
+        volume = float(bar["volume"])
+        open_price = float(bar["open_price"])
+        
+        price_change = _divide(close, self._prev_close) - 1
+        volume_change = _divide(volume, self._prev_volume) - 1
+        self._prev_close = close
+        self._prev_volume = volume
+        
+        self._change_5.push(price_change)
+        for window in (self._close_5, self._close_20, self._close_50):
+            window.push(close)
+        self._volume_5.push(volume)
+        
+        ma5 = self._close_5.mean()
+        ma20 = self._close_20.mean()
+        ma50 = self._close_50.mean()
+        avg_volume = self._volume_5.mean()
+        
+        day_range = _divide(float(bar["high_price"]) - float(bar["low_price"]), open_price)
+        
+        return {
+            "price_change": price_change,
+            "volatility": self._change_5.std(),
+            "ma5": ma5,
+            "ma20": ma20,
+            "ma50": ma50,
+            "price_rel_ma5": _divide(close, ma5) - 1,
+            "price_rel_ma20": _divide(close, ma20) - 1,
+            "price_rel_ma50": _divide(close, ma50) - 1,
+            "volume_change": volume_change,
+            "avg_volume_5d": avg_volume,
+            "volume_rel_avg": _divide(volume, avg_volume) - 1,
+            "day_range": day_range
+        }
+
+def extend_features(history: pd.DataFrame, new_bars: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute features for bars appended to a history without recomputing it
+    
+    Args:
+        history: Price history preceding new_bars, ordered by date
+        new_bars: Appended bars, ordered by date
+    
+    Returns:
+        Copy of new_bars with ENGINEERED_FEATURES columns added
+    """
+    engine = IncrementalFeatureEngine.from_history(history)
+    rows = [engine.update(bar) for bar in new_bars.to_dict("records")]
+    features = pd.DataFrame(rows, columns=ENGINEERED_FEATURES, index=new_bars.index)
+    return pd.concat([new_bars, features], axis=1)
@@ -2,13 +2,37 @@
 """
 Prediction logic for the ML models
 """
-import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Any, List, Tuple, Optional
 from datetime import datetime
 
-from data.stock_data import get_latest_data
-from data.database import save_prediction
+from data.stock_data import get_latest_data, get_latest_data_many
+from data.prediction_writer import PredictionRecord, enqueue_predictions
 from ml.features import get_feature_list
+from ml.scoring import get_scorer
+from utils.cache import LRUCache
+from config import AVAILABLE_SYMBOLS, PREDICT_BATCH_WORKERS
+
+# Prediction results keyed by (symbol, model version, latest bar date). A
+# prediction only changes when a new bar arrives or the model is retrained.
+# The same key is stored with each prediction_history row and backed by a
+# unique index, so restarts and other workers do not persist duplicates.
+_prediction_cache = LRUCache(max_entries=4 * len(AVAILABLE_SYMBOLS))
+
+def invalidate_predictions(symbol: Optional[str] = None) -> None:
+    """
+    Drop cached predictions for a symbol (all symbols if None)
+    """
+    _prediction_cache.invalidate(None if symbol is None else (lambda key: key[0] == symbol))
+
+def get_prediction_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss counters for the prediction cache
+    """
+    return _prediction_cache.stats()
+
+def _prediction_key(model_info: Dict[str, Any], symbol: str, latest: Dict[str, Any]) -> Tuple[str, Any, Any]:
+    return symbol, model_info["version"], latest["date"]
 
 def make_prediction(model_info: Dict[str, Any], symbol: str) -> Optional[Dict[str, Any]]:
     """
@@ -26,36 +50,117 @@ def make_prediction(model_info: Dict[str, Any], symbol: str) -> Optional[Dict[st
     if latest is None:
         return None
     
-    # Extract model and features
-    model = model_info["model"]
+    # Concurrent requests for the same bar and model wait for one scoring
+    # run, so the prediction is stored once
+    result = _prediction_cache.get_or_compute(
+        _prediction_key(model_info, symbol, latest),
+        lambda: _predict_and_store(model_info, symbol, latest)
+    )
+    return dict(result) if result is not None else None
+
+def _predict_and_store(model_info: Dict[str, Any], symbol: str, latest: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Score the latest row and queue the prediction for the background writer
+    """
+    scored = _score_latest(model_info, symbol, latest, datetime.now())
+    if scored is None:
+        return None
+    
+    result, record = scored
+    enqueue_predictions([record])
+    return result
+
+def make_predictions(
+    models: Dict[str, Optional[Dict[str, Any]]], 
+    symbols: List[str]
+) -> Dict[str, Optional[Dict[str, Any]]]:
+    """
+    Make next-day predictions for several stocks
+    
+    Latest rows are loaded with one query, cached predictions are reused and
+    the remaining symbols are scored concurrently; their predictions are
+    queued for the background writer together.
+    
+    Args:
+        models: Dictionary mapping symbols to model information
+        symbols: Stock symbols
+        
+    Returns:
+        Dictionary mapping each symbol to its prediction results, or None
+        if there is no model, no data or prediction fails
+    """
+    scorable = [symbol for symbol in symbols if models.get(symbol) is not None]
+    latest_rows = get_latest_data_many(scorable) if scorable else {}
+    scorable = [symbol for symbol in scorable if symbol in latest_rows]
+    
+    prediction_date = datetime.now()
+    records: List[PredictionRecord] = []
+    
+    def score(symbol: str) -> Optional[Dict[str, Any]]:
+        model_info, latest = models[symbol], latest_rows[symbol]
+        
+        def compute() -> Optional[Dict[str, Any]]:
+            scored = _score_latest(model_info, symbol, latest, prediction_date)
+            if scored is None:
+                return None
+            records.append(scored[1])
+            return scored[0]
+        
+        # Coalesces with concurrent single and batch requests for the same key
+        result = _prediction_cache.get_or_compute(_prediction_key(model_info, symbol, latest), compute)
+        return dict(result) if result is not None else None
+    
+    results = {}
+    if scorable:
+        workers = max(1, min(PREDICT_BATCH_WORKERS, len(scorable)))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = dict(zip(scorable, executor.map(score, scorable)))
+    
+    # Queue all new predictions for the background writer
+    enqueue_predictions(records)
+    
+    return {symbol: results.get(symbol) for symbol in symbols}
+
+def _score_latest(
+    model_info: Dict[str, Any], 
+    symbol: str, 
+    latest: Dict[str, Any], 
+    prediction_date: datetime
+) -> Optional[Tuple[Dict[str, Any], PredictionRecord]]:
+    """
+    Score the latest feature row of a symbol
+    
+    Args:
+        model_info: Dictionary with model and features
+        symbol: Stock symbol
+        latest: Latest data and features, as returned by get_latest_data
+        prediction_date: Timestamp stored with the prediction
+        
+    Returns:
+        Prediction results and the record to store, or None if scoring fails
+    """
     features = model_info["features"]
     
     try:
-        # Extract feature values
-        features_array = np.array([latest[f] for f in features]).reshape(1, -1)
-        
-        # Make prediction
-        prediction = bool(model.predict(features_array)[0])
-        confidence = float(model.predict_proba(features_array)[0][int(prediction)])
+        # Make prediction (one booster call gives both class and confidence)
+        prediction, confidence = get_scorer(model_info).score(latest)
         
         # Create feature dict for storage
         feature_dict = {f: float(latest[f]) for f in features if f in latest}
         
-        # Save prediction to database
-        current_date = datetime.now()
-        save_prediction(symbol, current_date, prediction, confidence, feature_dict)
-        
-        return {
+        result = {
             "symbol": symbol,
             "latest": latest,
             "prediction": {
                 "movement": prediction,
                 "confidence": confidence,
-                "date": datetime.now().strftime("%Y-%m-%d")
+                "date": prediction_date.strftime("%Y-%m-%d")
             },
             "model_accuracy": model_info["accuracy"],
             "feature_importance": model_info["feature_importance"]
         }
+        record = (symbol, prediction_date, prediction, confidence, feature_dict, model_info["version"], latest["date"])
+        return result, record
     except Exception as e:
         print(f"Error making prediction: {e}")
         return None
\ No newline at end of file
@@ -2,13 +2,14 @@
 """
 Model training functionality
 """
+import hashlib
 import xgboost as xgb
 import pandas as pd
 import numpy as np
 from typing import Dict, Any, List, Optional, Tuple
 from sklearn.metrics import accuracy_score
 
-from data.stock_data import get_data
+from data.feature_store import get_feature_data
 from ml.features import prepare_training_data, split_data, get_feature_list
 from config import MODEL_PARAMS
 
@@ -23,8 +24,8 @@ def train_model(symbol: str) -> Optional[Dict[str, Any]]:
         Dictionary with model, accuracy, feature importance, and features list
         or None if training fails
     """
-    # Get stock data
-    df = get_data(symbol)
+    # Get stock data with precomputed features
+    df = get_feature_data(symbol)
     if df is None:
         print(f"No data found for {symbol}")
         return None
@@ -58,8 +59,15 @@ def train_model(symbol: str) -> Optional[Dict[str, Any]]:
             "importance": model.feature_importances_.tolist()
         }
         
+        # Predictions cached for the previous model of this symbol are stale
+        from ml.prediction import invalidate_predictions
+        invalidate_predictions(symbol)
+        
         return {
             "model": model,
+            # Identifies the fitted trees in prediction cache and dedup keys;
+            # retraining on the same data gives the same version
+            "version": hashlib.sha1(bytes(model.get_booster().save_raw())).hexdigest()[:12],
             "accuracy": accuracy,
             "feature_importance": feature_importance,
             "features": features
@@ -0,0 +1,142 @@
+# services/backtest.py
+"""
+Vectorized backtest engine for the long/flat prediction strategy
+
+The strategy holds the stock after every day the model confidently predicts
+"up" and is flat after every confident "down" day, keeping its position on
+days below the confidence threshold, so the position series is the forward
+filled prediction series. Positions, cash and the equity curve are therefore computed with
+array operations; only the (few) trade events are walked in Python so that
+cash and share amounts compound with exactly the same arithmetic as the
+original day-by-day loop.
+"""
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List
+
+def format_dates(dates: pd.Series) -> List[str]:
+    """
+    Format a date column as YYYY-MM-DD strings
+    """
+    if pd.api.types.is_datetime64_any_dtype(dates):
+        return dates.dt.strftime("%Y-%m-%d").tolist()
+    return [d.strftime("%Y-%m-%d") if isinstance(d, pd.Timestamp) else str(d) for d in dates]
+
+def run_backtest(
+    dates: List[str],
+    prices: np.ndarray,
+    probabilities: np.ndarray,
+    initial_balance: float,
+    confidence_threshold: float = 0.5
+) -> Dict[str, Any]:
+    """
+    Simulate trading on model probabilities for consecutive days
+    
+    A decision is taken at the close of every day except the last: buy with
+    the whole balance on an "up" prediction while flat, sell everything on a
+    "down" prediction while holding. Predictions whose confidence is below
+    confidence_threshold are ignored (the default of 0.5 acts on every
+    prediction). Any position left on the last day is reported as a final sell.
+    
+    Args:
+        dates: Formatted date for each day
+        prices: Close price for each day
+        probabilities: predict_proba output, shape (days, 2)
+        initial_balance: Initial portfolio balance
+        confidence_threshold: Minimum confidence needed to act on a prediction
+        
+    Returns:
+        Dictionary with trades, daily_balance, final_balance and final shares
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    n_days = len(prices)
+    steps = max(n_days - 1, 0)  # the last day has no next-day price to trade on
+    
+    up = probabilities[:steps, 1] > 0.5
+    confidence = np.where(up, probabilities[:steps, 1], probabilities[:steps, 0]).astype(np.float64)
+    
+    # Position after each day's decision: follow confident predictions and
+    # carry the previous position through the others
+    acted = confidence >= confidence_threshold
+    last_acted = np.maximum.accumulate(np.where(acted, np.arange(steps), -1))
+    holding = np.where(last_acted >= 0, up[np.maximum(last_acted, 0)], False)
+    
+    # Days where the position changes
+    previous = np.concatenate(([False], holding[:-1])) if steps else holding
+    events = np.flatnonzero(holding != previous)
+    
+    # Walk the trade events to carry cash and shares across them
+    trades = []
+    balance = initial_balance
+    shares = 0
+    segment_cash = [balance]
+    segment_shares = [shares]
+    for i in events.tolist():
+        price = prices[i]
+        if holding[i]:
+            shares = balance / price
+            trade_value = shares * price
+            balance = 0
+            action = "BUY"
+        else:
+            trade_value = shares * price
+            balance = trade_value
+            action = "SELL"
+        
+        trades.append({
+            "date": dates[i],
+            "action": action,
+            "price": float(price),
+            "shares": float(shares),
+            "value": float(trade_value),
+            "confidence": float(confidence[i])
+        })
+        if action == "SELL":
+            shares = 0
+        segment_cash.append(balance)
+        segment_shares.append(shares)
+    
+    # Broadcast the per-segment state onto every day
+    segment = np.zeros(steps, dtype=np.int64)
+    if len(events):
+        segment[events] = 1
+        segment = np.cumsum(segment)
+    cash = np.asarray(segment_cash, dtype=np.float64)[segment]
+    held_shares = np.asarray(segment_shares, dtype=np.float64)[segment]
+    equity = cash + held_shares * prices[:steps]
+    
+    daily_balance = [
+        {"date": date, "balance": value, "shares": held, "price": price}
+        for date, value, held, price in zip(
+            dates[:steps], equity.tolist(), held_shares.tolist(), prices[:steps].tolist()
+        )
+    ]
+    
+    # Final day
+    final_price = prices[-1]
+    final_balance = balance + (shares * final_price)
+    
+    # If we still have shares, sell them at the end
+    if shares > 0:
+        trades.append({
+            "date": dates[-1],
+            "action": "FINAL SELL",
+            "price": float(final_price),
+            "shares": float(shares),
+            "value": float(shares * final_price),
+            "confidence": 1.0
+        })
+    
+    daily_balance.append({
+        "date": dates[-1],
+        "balance": float(final_balance),
+        "shares": float(shares),
+        "price": float(final_price)
+    })
+    
+    return {
+        "trades": trades,
+        "daily_balance": daily_balance,
+        "final_balance": final_balance,
+        "shares": shares
+    }
@@ -0,0 +1,186 @@
+# services/compute.py
+"""
+Process pool for CPU-bound work (portfolio simulation, model training)
+
+Jobs run in separate worker processes so XGBoost fits and backtests do not
+hold the GIL of the web worker. The number of jobs admitted at once is
+bounded: async callers are rejected with ComputeSaturatedError when the pool
+and its queue are full, background callers wait for a free slot. A job that
+overruns its timeout cannot be interrupted inside its worker, so the pool is
+recycled: its workers are terminated and the next job starts a fresh pool.
+"""
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional, Tuple
+
+from config import COMPUTE_WORKERS, COMPUTE_MAX_QUEUE, COMPUTE_JOB_TIMEOUT
+
+class ComputeSaturatedError(Exception):
+    """Raised when the compute pool has no free slot for another job"""
+
+class ComputeTimeoutError(Exception):
+    """Raised when a compute job does not finish within its timeout"""
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+# Running plus queued jobs; a slot is only released once the job really ends
+_slots = threading.BoundedSemaphore(COMPUTE_WORKERS + COMPUTE_MAX_QUEUE)
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn avoids inheriting the web worker's threads and DB sockets
+                _executor = ProcessPoolExecutor(
+                    max_workers=COMPUTE_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+    return _executor
+
+def _discard_executor(executor: ProcessPoolExecutor) -> bool:
+    """
+    Stop handing out an executor so the next job starts a new one
+    
+    Returns:
+        bool: False if the executor had already been replaced
+    """
+    global _executor
+    
+    with _executor_lock:
+        if _executor is not executor:
+            return False
+        _executor = None
+        return True
+
+def _submit(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Future, ProcessPoolExecutor]:
+    """
+    Submit a job whose slot has already been acquired
+    
+    Returns:
+        The job's future and the executor running it
+    """
+    try:
+        executor = _get_executor()
+        try:
+            future = executor.submit(fn, *args, **kwargs)
+        except BrokenProcessPool:
+            # A worker died since the last job; retry once on a fresh pool
+            _discard_executor(executor)
+            executor = _get_executor()
+            future = executor.submit(fn, *args, **kwargs)
+    except Exception:
+        _slots.release()
+        raise
+    future.add_done_callback(lambda _: _slots.release())
+    return future, executor
+
+def _abort(future: Future, executor: ProcessPoolExecutor, timeout: Optional[float]) -> None:
+    """
+    Stop a job that overran its timeout, recycling the pool if it already started
+    
+    Terminating the workers fails every job of the old pool with
+    BrokenProcessPool, which releases their slots.
+    """
+    if future.cancel() or future.done():
+        return
+    if not _discard_executor(executor):
+        return  # already recycled by another timeout
+    
+    print(f"Compute job exceeded {timeout}s, restarting the compute pool")
+    # ProcessPoolExecutor has no public way to stop a running job before 3.14
+    for process in list((executor._processes or {}).values()):
+        process.terminate()
+    executor.shutdown(wait=False, cancel_futures=True)
+
+async def run_compute(
+    fn: Callable[..., Any], 
+    *args: Any, 
+    timeout: Optional[float] = COMPUTE_JOB_TIMEOUT, 
+    **kwargs: Any
+) -> Any:
+    """
+    Run a CPU-bound function in the process pool from async code
+    
+    Args:
+        fn: Picklable module-level function
+        *args: Positional arguments for fn
+        timeout: Seconds to wait for the result (None waits forever)
+        **kwargs: Keyword arguments for fn
+    
+    Returns:
+        The function's return value
+    
+    Raises:
+        ComputeSaturatedError: If all workers are busy and the queue is full,
+            or the job was lost because the pool was restarted
+        ComputeTimeoutError: If the job does not finish in time
+    """
+    if not _slots.acquire(blocking=False):
+        raise ComputeSaturatedError("Compute pool is saturated")
+    
+    future, executor = _submit(fn, *args, **kwargs)
+    try:
+        return await asyncio.wait_for(asyncio.wrap_future(future), timeout)
+    except asyncio.TimeoutError:
+        _abort(future, executor, timeout)
+        raise ComputeTimeoutError(f"Compute job exceeded {timeout}s")
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        raise ComputeSaturatedError("Compute pool was restarted")
+
+def run_compute_sync(
+    fn: Callable[..., Any], 
+    *args: Any, 
+    timeout: Optional[float] = COMPUTE_JOB_TIMEOUT, 
+    **kwargs: Any
+) -> Any:
+    """
+    Run a CPU-bound function in the process pool from a background thread
+    
+    Unlike run_compute this waits for a free slot instead of failing, so
+    periodic jobs yield to request traffic; the wait is bounded by timeout.
+    
+    Args:
+        fn: Picklable module-level function
+        *args: Positional arguments for fn
+        timeout: Seconds to wait for the result (None waits forever)
+        **kwargs: Keyword arguments for fn
+    
+    Returns:
+        The function's return value
+    
+    Raises:
+        ComputeSaturatedError: If no slot frees up within timeout, or the job
+            was lost because the pool was restarted
+        ComputeTimeoutError: If the job does not finish in time
+    """
+    if not _slots.acquire(timeout=timeout):
+        print(f"Skipping {getattr(fn, '__name__', fn)}: no compute slot free after {timeout}s")
+        raise ComputeSaturatedError("Compute pool is saturated")
+    
+    future, executor = _submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout)
+    except FutureTimeoutError:
+        _abort(future, executor, timeout)
+        raise ComputeTimeoutError(f"Compute job exceeded {timeout}s")
+    except BrokenProcessPool:
+        _discard_executor(executor)
+        raise ComputeSaturatedError("Compute pool was restarted")
+
+def shutdown_compute() -> None:
+    """
+    Stop the worker processes (called on application shutdown)
+    """
+    global _executor
+    
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+            _executor = None
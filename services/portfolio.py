@@ -2,177 +2,438 @@
 """
 Portfolio simulation functionality
 """
+import hashlib
+import json
+import os
+import time
 import pandas as pd
 import numpy as np
 import xgboost as xgb
 from typing import Dict, Any, List, Optional
 from datetime import datetime, timedelta
 
-from data.stock_data import get_data
 from data.database import save_portfolio_simulation
-from ml.features import add_features, get_feature_list
+from data.feature_store import get_feature_data, get_feature_data_many
+from ml.features import FEATURE_WARMUP_ROWS, ensure_features, get_feature_list
+from services.backtest import run_backtest, format_dates
+from utils.cache import LRUCache
+from config import (
+    MODEL_CACHE_MAX_ENTRIES, MODEL_CACHE_MAX_BYTES, MODEL_CACHE_DIR, MODEL_CACHE_DISK_TTL
+)
 
-def simulate_portfolio(symbol: str, days: int = 90, initial_balance: float = 10000) -> Optional[Dict[str, Any]]:
+try:
+    import fcntl
+except ImportError:  # not available on Windows; workers may then train the same model twice
+    fcntl = None
+
+# Parameters of the walk-forward model trained for simulations
+SIMULATION_MODEL_PARAMS = {"random_state": 42}
+
+def _model_size(model: xgb.XGBClassifier) -> int:
+    return len(model.get_booster().save_raw())
+
+# Models keyed by (symbol, training cutoff, features, params hash). The LRU
+# is per process and sits in front of MODEL_CACHE_DIR, which every compute
+# worker reads and writes, so a model is trained once across all workers.
+_model_cache = LRUCache(
+    max_entries=MODEL_CACHE_MAX_ENTRIES,
+    max_bytes=MODEL_CACHE_MAX_BYTES,
+    sizeof=_model_size
+)
+
+def _params_hash(params: Dict[str, Any]) -> str:
+    return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+def _train_simulation_model(
+    symbol: str, 
+    cutoff_date: Any, 
+    features: List[str],
+    history: Optional[pd.DataFrame] = None
+) -> Optional[xgb.XGBClassifier]:
     """
-    Run a portfolio simulation based on a trained model
+    Train the walk-forward model on all data before the cutoff date
     
     Args:
         symbol: Stock symbol
-        days: Number of days to simulate
-        initial_balance: Initial portfolio balance
+        cutoff_date: First day of the simulation window
+        features: Feature columns to train on
+        history: Already loaded price history for the symbol
         
     Returns:
-        Dictionary with simulation results or None if simulation fails
+        Fitted model or None if there is not enough history
     """
-    # Get historical data for simulation period
-    df = get_data(symbol, period="1y")
-    if df is None or len(df) < days:
-        return None
-        
-    # Only use the last X days for simulation
-    df = df.tail(days).copy()
-    
     # Get data for model training (data before simulation period)
-    model_data = get_data(symbol, period="2y")
+    model_data = history if history is not None else get_feature_data(symbol)
     if model_data is None:
         return None
-        
-    # Find cutoff date (start of simulation)
-    cutoff_date = df.iloc[0]["date"]
     
-    # Use only data before simulation for training
+    # Use only data before simulation for training. Features are backward
+    # looking, so rows computed on the full history match a computation on
+    # the training prefix alone.
+    model_data = ensure_features(model_data)
     training_data = model_data[model_data["date"] < cutoff_date].copy()
-    
-    # Add features to both datasets
-    training_data = add_features(training_data)
-    df = add_features(df)
-    
-    # Add target for training data
     training_data["target"] = (training_data["close_price"].shift(-1) > training_data["close_price"]).astype(int)
-    df["target"] = (df["close_price"].shift(-1) > df["close_price"]).astype(int)
-    
-    # Drop missing values
     training_data = training_data.dropna()
-    df = df.dropna()
     
     if len(training_data) < 30:
         return None
-        
-    # Get features for prediction
-    features = get_feature_list()
     
     # Train the model on historical data
-    model = xgb.XGBClassifier(random_state=42)
+    model = xgb.XGBClassifier(**SIMULATION_MODEL_PARAMS)
     model.fit(training_data[features], training_data["target"])
+    return model
+
+def _model_path(key: tuple) -> str:
+    symbol, cutoff, features, params_hash = key
+    name = f"{symbol}|{cutoff.isoformat()}|{','.join(features)}|{params_hash}"
+    return os.path.join(MODEL_CACHE_DIR, hashlib.sha1(name.encode()).hexdigest() + ".json")
+
+def _read_model(path: str) -> Optional[xgb.XGBClassifier]:
+    """
+    Load a model stored by another process (None if there is none)
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        model = xgb.XGBClassifier()
+        model.load_model(path)
+        return model
+    except Exception as e:
+        print(f"Error loading cached model {path}: {e}")
+        return None
+
+def _write_model(path: str, model: xgb.XGBClassifier) -> None:
+    """
+    Store a model atomically and remove models older than MODEL_CACHE_DISK_TTL
+    """
+    tmp_path = f"{path}.{os.getpid()}.tmp.json"
+    try:
+        model.save_model(tmp_path)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        print(f"Error storing cached model {path}: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return
     
-    # Run simulation
-    balance = initial_balance
-    shares = 0
-    trades = []
-    daily_balance = []
+    expired = time.time() - MODEL_CACHE_DISK_TTL
+    for entry in os.scandir(MODEL_CACHE_DIR):
+        try:
+            if entry.stat().st_mtime < expired:
+                os.remove(entry.path)
+        except OSError:
+            pass
+
+def _load_or_train_model(
+    key: tuple,
+    symbol: str,
+    cutoff_date: Any,
+    features: List[str],
+    history: Optional[pd.DataFrame]
+) -> Optional[xgb.XGBClassifier]:
+    """
+    Load the model from MODEL_CACHE_DIR or train and store it
     
-    for i in range(len(df) - 1):  # -1 because we need the next day's price
-        current_data = df.iloc[i]
-        next_data = df.iloc[i + 1]
-        
-        # Make prediction
-        features_array = current_data[features].values.reshape(1, -1)
-        prediction = model.predict(features_array)[0]
-        confidence = model.predict_proba(features_array)[0][prediction]
-        
-        # Decision based on prediction
-        if prediction == 1 and shares == 0:  # Predict price will go up -> Buy
-            # Buy shares
-            shares = balance / current_data["close_price"]
-            trade_cost = shares * current_data["close_price"]
-            balance = 0
-            
-            trades.append({
-                "date": current_data["date"].strftime("%Y-%m-%d") if isinstance(current_data["date"], pd.Timestamp) else str(current_data["date"]),
-                "action": "BUY",
-                "price": float(current_data["close_price"]),
-                "shares": float(shares),
-                "value": float(trade_cost),
-                "confidence": float(confidence)
-            })
+    Workers missing the same key wait on a per-key file lock, so only the
+    first one trains and the others load its result.
+    """
+    if not MODEL_CACHE_DIR:
+        return _train_simulation_model(symbol, cutoff_date, features, history)
+    
+    os.makedirs(MODEL_CACHE_DIR, exist_ok=True)
+    path = _model_path(key)
+    model = _read_model(path)
+    if model is not None:
+        return model
+    
+    with open(path + ".lock", "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            model = _read_model(path)
+            if model is None:
+                model = _train_simulation_model(symbol, cutoff_date, features, history)
+                if model is not None:
+                    _write_model(path, model)
+            return model
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+def get_simulation_model(
+    symbol: str, 
+    cutoff_date: Any, 
+    features: List[str],
+    history: Optional[pd.DataFrame] = None
+) -> Optional[xgb.XGBClassifier]:
+    """
+    Get the walk-forward model for a simulation, training it on a cache miss
+    
+    Concurrent requests for the same key, in this process or in other
+    compute workers, wait for a single training run.
+    
+    Args:
+        symbol: Stock symbol
+        cutoff_date: First day of the simulation window
+        features: Feature columns to train on
+        history: Already loaded price history for the symbol
         
-        elif prediction == 0 and shares > 0:  # Predict price will go down -> Sell
-            # Sell shares
-            trade_value = shares * current_data["close_price"]
-            balance = trade_value
-            
-            trades.append({
-                "date": current_data["date"].strftime("%Y-%m-%d") if isinstance(current_data["date"], pd.Timestamp) else str(current_data["date"]),
-                "action": "SELL",
-                "price": float(current_data["close_price"]),
-                "shares": float(shares),
-                "value": float(trade_value),
-                "confidence": float(confidence)
-            })
-            
-            shares = 0
+    Returns:
+        Fitted model or None if there is not enough history
+    """
+    key = (symbol, pd.Timestamp(cutoff_date), tuple(features), _params_hash(SIMULATION_MODEL_PARAMS))
+    return _model_cache.get_or_compute(
+        key, lambda: _load_or_train_model(key, symbol, cutoff_date, features, history)
+    )
+
+def get_model_cache_stats() -> Dict[str, Any]:
+    """
+    Get hit/miss/eviction counters for the simulation model cache
+    """
+    return _model_cache.stats()
+
+def prepare_window(history: pd.DataFrame, days: int) -> pd.DataFrame:
+    """
+    Build the feature frame for the last days of a price history
+    
+    The first FEATURE_WARMUP_ROWS rows of the window are dropped, exactly as
+    if the features had been computed on the window alone.
+    
+    Args:
+        history: Full price history for a symbol, ordered by date, with or
+            without precomputed features
+        days: Number of days to simulate
         
-        # Calculate total value for this day
-        total_value = balance + (shares * current_data["close_price"])
+    Returns:
+        DataFrame with features and target for the simulated days
+    """
+    # Only use the last X days for simulation
+    df = ensure_features(history).tail(days).iloc[FEATURE_WARMUP_ROWS:].copy()
+    df["target"] = (df["close_price"].shift(-1) > df["close_price"]).astype(int)
+    return df.dropna()
+
+def _simulate_history(
+    symbol: str, 
+    history: pd.DataFrame, 
+    days: int, 
+    initial_balance: float
+) -> Optional[Dict[str, Any]]:
+    """
+    Simulate one symbol over the last days of an already loaded history
+    
+    Args:
+        symbol: Stock symbol
+        history: Full price history for the symbol, ordered by date
+        days: Number of days to simulate
+        initial_balance: Initial balance for this symbol
         
-        daily_balance.append({
-            "date": current_data["date"].strftime("%Y-%m-%d") if isinstance(current_data["date"], pd.Timestamp) else str(current_data["date"]),
-            "balance": float(total_value),
-            "shares": float(shares),
-            "price": float(current_data["close_price"])
-        })
-    
-    # Final day
-    final_day = df.iloc[-1]
-    final_balance = balance + (shares * final_day["close_price"])
-    
-    # If we still have shares, sell them at the end
-    if shares > 0:
-        trades.append({
-            "date": final_day["date"].strftime("%Y-%m-%d") if isinstance(final_day["date"], pd.Timestamp) else str(final_day["date"]),
-            "action": "FINAL SELL",
-            "price": float(final_day["close_price"]),
-            "shares": float(shares),
-            "value": float(shares * final_day["close_price"]),
-            "confidence": 1.0
-        })
+    Returns:
+        Dictionary with simulation results or None if simulation fails
+    """
+    if history is None or len(history) < days:
+        return None
+    history = ensure_features(history)
+    
+    # Find cutoff date (start of simulation)
+    cutoff_date = history.iloc[-days]["date"]
+    df = prepare_window(history, days)
+    
+    # Nothing left to simulate after the warm-up rows; skip the model fit
+    if len(df) == 0:
+        return None
+    
+    # Get features for prediction
+    features = get_feature_list()
+    
+    # Reuse a model trained on the same history if one is cached
+    model = get_simulation_model(symbol, cutoff_date, features, history)
+    if model is None:
+        return None
+    
+    # Score the whole simulation window in one batch and run the backtest
+    probabilities = model.predict_proba(df[features])
+    backtest = run_backtest(
+        format_dates(df["date"]),
+        df["close_price"].to_numpy(dtype=np.float64),
+        probabilities,
+        initial_balance
+    )
+    final_balance = backtest["final_balance"]
     
     # Calculate buy & hold strategy
+    final_day = df.iloc[-1]
     buy_and_hold_shares = initial_balance / df.iloc[0]["close_price"]
     buy_and_hold_final = buy_and_hold_shares * final_day["close_price"]
     
-    # Add final daily balance
-    daily_balance.append({
-        "date": final_day["date"].strftime("%Y-%m-%d") if isinstance(final_day["date"], pd.Timestamp) else str(final_day["date"]),
-        "balance": float(final_balance),
-        "shares": float(shares),
-        "price": float(final_day["close_price"])
-    })
+    return {
+        "initial_balance": initial_balance,
+        "final_balance": final_balance,
+        "roi_percentage": ((final_balance / initial_balance) - 1) * 100,
+        "trades": backtest["trades"],
+        "daily_balance": backtest["daily_balance"],
+        "buy_and_hold": {
+            "initial_balance": initial_balance,
+            "final_balance": buy_and_hold_final,
+            "roi_percentage": ((buy_and_hold_final / initial_balance) - 1) * 100
+        },
+        "symbol": symbol,
+        "days": days
+    }
+
+def simulate_portfolio(
+    symbol: str, 
+    days: int = 90, 
+    initial_balance: float = 10000,
+    save: bool = True
+) -> Optional[Dict[str, Any]]:
+    """
+    Run a portfolio simulation based on a trained model
+    
+    Args:
+        symbol: Stock symbol
+        days: Number of days to simulate
+        initial_balance: Initial portfolio balance
+        save: Whether to store the results in portfolio_simulation
+        
+    Returns:
+        Dictionary with simulation results or None if simulation fails
+    """
+    # The same history serves the simulation window and model training
+    history = get_feature_data(symbol, period="1y")
+    result = _simulate_history(symbol, history, days, initial_balance)
+    if result is None:
+        return None
+    
+    # Save simulation results to database
+    if save:
+        save_portfolio_simulation(
+            datetime.now() - timedelta(days=days),
+            datetime.now(),
+            initial_balance,
+            result["final_balance"],
+            result["roi_percentage"],
+            result["trades"]
+        )
+    
+    return result
+
+def _combine_daily_balances(positions: Dict[str, Dict[str, Any]], allocation: float) -> List[Dict[str, Any]]:
+    """
+    Sum per-symbol equity curves into one portfolio curve
+    
+    Days on which a symbol has no bar carry its previous value forward
+    (its allocation before its first simulated day).
+    """
+    curves = {
+        symbol: pd.Series(
+            [day["balance"] for day in position["daily_balance"]],
+            index=[day["date"] for day in position["daily_balance"]]
+        )
+        for symbol, position in positions.items()
+    }
+    combined = pd.DataFrame(curves).sort_index().ffill().fillna(allocation)
+    total = combined.sum(axis=1)
+    return [
+        {"date": date, "balance": float(balance)}
+        for date, balance in zip(total.index.tolist(), total.tolist())
+    ]
+
+def simulate_multi_portfolio(
+    symbols: List[str], 
+    days: int = 90, 
+    initial_balance: float = 10000,
+    save: bool = True
+) -> Optional[Dict[str, Any]]:
+    """
+    Run a portfolio simulation across several symbols
+    
+    Capital is split equally between the symbols and each share of it is
+    traded independently with that symbol's model. Price histories with
+    their stored features are loaded for all symbols with one query.
+    
+    Args:
+        symbols: Stock symbols
+        days: Number of days to simulate
+        initial_balance: Initial portfolio balance
+        save: Whether to store the results in portfolio_simulation
+        
+    Returns:
+        Dictionary with combined and per-symbol results or None if no
+        symbol could be simulated
+    """
+    if not symbols:
+        return None
+    
+    histories = get_feature_data_many(symbols)
+    allocation = initial_balance / len(symbols)
+    
+    positions = {}
+    skipped = []
+    for symbol in symbols:
+        history = histories.get(symbol)
+        if history is None:
+            # No stored bars: fall back to the market data provider like simulate_portfolio
+            history = get_feature_data(symbol, period="1y")
+        result = _simulate_history(symbol, history, days, allocation)
+        if result is None:
+            skipped.append(symbol)
+        else:
+            positions[symbol] = result
+    
+    if not positions:
+        return None
+    
+    # Capital allocated to symbols that could not be simulated stays in cash
+    cash = allocation * len(skipped)
+    final_balance = cash + sum(p["final_balance"] for p in positions.values())
+    buy_and_hold_final = cash + sum(p["buy_and_hold"]["final_balance"] for p in positions.values())
+    
+    trades = [
+        dict(trade, symbol=symbol)
+        for symbol, position in positions.items()
+        for trade in position["trades"]
+    ]
+    trades.sort(key=lambda trade: trade["date"])
+    
+    daily_balance = _combine_daily_balances(positions, allocation)
+    for day in daily_balance:
+        day["balance"] += cash
     
-    # Create result dictionary
     result = {
         "initial_balance": initial_balance,
         "final_balance": final_balance,
         "roi_percentage": ((final_balance / initial_balance) - 1) * 100,
+        "allocation_per_symbol": allocation,
         "trades": trades,
         "daily_balance": daily_balance,
+        "positions": {
+            symbol: {
+                "final_balance": position["final_balance"],
+                "roi_percentage": position["roi_percentage"],
+                "buy_and_hold_roi_percentage": position["buy_and_hold"]["roi_percentage"],
+                "trades": len(position["trades"])
+            }
+            for symbol, position in positions.items()
+        },
         "buy_and_hold": {
             "initial_balance": initial_balance,
             "final_balance": buy_and_hold_final,
             "roi_percentage": ((buy_and_hold_final / initial_balance) - 1) * 100
         },
-        "symbol": symbol,
+        "symbols": list(positions),
+        "skipped": skipped,
         "days": days
     }
     
-    # Save simulation results to database
-    save_portfolio_simulation(
-        datetime.now() - timedelta(days=days),
-        datetime.now(),
-        initial_balance,
-        final_balance,
-        result["roi_percentage"],
-        trades
-    )
+    if save:
+        save_portfolio_simulation(
+            datetime.now() - timedelta(days=days),
+            datetime.now(),
+            initial_balance,
+            final_balance,
+            result["roi_percentage"],
+            trades,
+            strategy="ai_prediction_multi"
+        )
     
-    return result
\ No newline at end of file
+    return result
@@ -0,0 +1,131 @@
+# services/sweep.py
+"""
+Parameter sweeps over the portfolio simulation
+
+A sweep evaluates every combination of simulation length, initial balance
+and confidence threshold for one symbol. The price history is loaded once
+and a single walk-forward model, trained on the data before the longest
+window, scores every window; only the backtests differ between cells.
+Backtests take milliseconds, so the whole grid runs as one compute job
+(run_sweep) rather than one job per slice.
+"""
+import numpy as np
+from typing import Dict, Any, List, Optional
+
+from data.feature_store import get_feature_data
+from ml.features import get_feature_list
+from services.backtest import run_backtest, format_dates
+from services.portfolio import get_simulation_model, prepare_window
+
+def prepare_sweep(symbol: str, days_values: List[int]) -> Optional[Dict[int, Dict[str, Any]]]:
+    """
+    Load data, fit the shared model and score each simulation window
+    
+    Args:
+        symbol: Stock symbol
+        days_values: Simulation lengths in the grid
+    
+    Returns:
+        Dictionary mapping each simulation length to its dates, close prices
+        and model probabilities, or None if the sweep cannot run
+    """
+    history = get_feature_data(symbol, period="1y")
+    max_days = max(days_values)
+    if history is None or len(history) < max_days:
+        return None
+    
+    # Every window is a suffix of the longest one, so a model trained before
+    # the longest window never sees any simulated day
+    features = get_feature_list()
+    cutoff_date = history.iloc[-max_days]["date"]
+    model = get_simulation_model(symbol, cutoff_date, features, history)
+    if model is None:
+        return None
+    
+    windows = {}
+    for days in sorted(set(days_values)):
+        df = prepare_window(history, days)
+        if len(df) == 0:
+            continue  # reported as an error for each of its cells by run_sweep
+        windows[days] = {
+            "dates": format_dates(df["date"]),
+            "prices": df["close_price"].to_numpy(dtype=np.float64),
+            "probabilities": model.predict_proba(df[features])
+        }
+    return windows
+
+def run_sweep_cells(
+    window: Dict[str, Any],
+    days: int,
+    confidence_threshold: float,
+    initial_balances: List[float]
+) -> List[Dict[str, Any]]:
+    """
+    Backtest one scored window for each initial balance
+    
+    Args:
+        window: Entry produced by prepare_sweep
+        days: Simulation length of the window
+        confidence_threshold: Minimum confidence needed to act on a prediction
+        initial_balances: Initial balances to evaluate
+    
+    Returns:
+        List of cell results
+    """
+    prices = window["prices"]
+    buy_and_hold_return = prices[-1] / prices[0]
+    
+    cells = []
+    for initial_balance in initial_balances:
+        backtest = run_backtest(
+            window["dates"], prices, window["probabilities"],
+            initial_balance, confidence_threshold
+        )
+        final_balance = float(backtest["final_balance"])
+        cells.append({
+            "days": days,
+            "initial_balance": initial_balance,
+            "confidence_threshold": confidence_threshold,
+            "final_balance": final_balance,
+            "roi_percentage": ((final_balance / initial_balance) - 1) * 100,
+            "trades": len(backtest["trades"]),
+            "buy_and_hold_roi_percentage": float((buy_and_hold_return - 1) * 100)
+        })
+    return cells
+
+def run_sweep(
+    symbol: str,
+    days_values: List[int],
+    confidence_thresholds: List[float],
+    initial_balances: List[float]
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Run every cell of a sweep grid
+    
+    Args:
+        symbol: Stock symbol
+        days_values: Simulation lengths
+        confidence_thresholds: Minimum prediction confidences to trade on
+        initial_balances: Initial balances
+    
+    Returns:
+        List of cell results ordered by days and threshold (an entry with an
+        error for each cell whose window has no simulated days), or None if
+        the sweep cannot run
+    """
+    windows = prepare_sweep(symbol, days_values)
+    if not windows:
+        return None
+    
+    cells = []
+    for days in sorted(set(days_values)):
+        for confidence_threshold in confidence_thresholds:
+            if days not in windows:
+                cells.append({
+                    "days": days,
+                    "confidence_threshold": confidence_threshold,
+                    "error": "No simulated days left after the feature warm-up"
+                })
+                continue
+            cells.extend(run_sweep_cells(windows[days], days, confidence_threshold, initial_balances))
+    return cells
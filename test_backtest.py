@@ -0,0 +1,66 @@
+# test_backtest.py
+"""
+The vectorized backtest engine must reproduce the day-by-day simulation loop
+it replaced, trade for trade and day for day. Runs on synthetic prices with
+a fixed scoring model, so no database or trained model is needed.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from benchmarks.bench_backtest import legacy_loop
+from benchmarks.synthetic import make_price_frame
+from services.backtest import run_backtest, format_dates
+
+FEATURES = ["signal"]
+
+class SignalModel:
+    """
+    Classifier stand-in whose up probability is a logistic function of the signal column
+    """
+    
+    def predict_proba(self, X) -> np.ndarray:
+        signal = np.asarray(X, dtype=np.float64)[:, 0]
+        up = 1 / (1 + np.exp(-signal))
+        return np.column_stack([1 - up, up])
+    
+    def predict(self, X) -> np.ndarray:
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+def make_frame(n_days: int, seed: int, signal=None) -> pd.DataFrame:
+    df = make_price_frame(n_days, seed=seed)
+    if signal is None:
+        signal = np.random.default_rng(seed).normal(0, 1, n_days)
+    df["signal"] = signal
+    return df
+
+def vectorized(model, df, initial_balance):
+    result = run_backtest(
+        format_dates(df["date"]), df["close_price"].to_numpy(dtype=np.float64),
+        model.predict_proba(df[FEATURES]), initial_balance
+    )
+    return result["trades"], result["daily_balance"], result["final_balance"]
+
+@pytest.mark.parametrize("n_days,seed", [(2, 1), (30, 2), (252, 3), (1260, 4)])
+def test_matches_legacy_loop(n_days, seed):
+    df = make_frame(n_days, seed)
+    model = SignalModel()
+    
+    expected = legacy_loop(model, df, FEATURES, 10000)
+    actual = vectorized(model, df, 10000)
+    
+    assert actual == expected
+
+@pytest.mark.parametrize("signal,actions", [
+    (1.0, ["BUY", "FINAL SELL"]),
+    (-1.0, [])
+])
+def test_constant_prediction(signal, actions):
+    df = make_frame(60, 5, signal=np.full(60, signal))
+    model = SignalModel()
+    
+    expected = legacy_loop(model, df, FEATURES, 10000)
+    actual = vectorized(model, df, 10000)
+    
+    assert actual == expected
+    assert [trade["action"] for trade in actual[0]] == actions
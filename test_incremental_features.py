@@ -0,0 +1,91 @@
+# test_incremental_features.py
+"""
+Features produced incrementally (IncrementalFeatureEngine, extend_features)
+must match add_features over the full history, NaN warm-up rows included.
+Runs on synthetic prices, so no database or network is needed.
+"""
+import numpy as np
+import pytest
+
+from benchmarks.synthetic import make_price_frame
+from ml.features import ENGINEERED_FEATURES, FEATURE_WARMUP_ROWS, add_features
+from ml.incremental_features import BOOTSTRAP_ROWS, IncrementalFeatureEngine, extend_features
+
+RTOL = 1e-7
+ATOL = 1e-9
+
+def expected_features(df) -> np.ndarray:
+    return add_features(df)[ENGINEERED_FEATURES].to_numpy(dtype=float)
+
+def assert_features_match(expected: np.ndarray, actual: np.ndarray):
+    assert actual.shape == expected.shape
+    np.testing.assert_array_equal(np.isnan(actual), np.isnan(expected))
+    assert np.allclose(actual, expected, rtol=RTOL, atol=ATOL, equal_nan=True)
+
+@pytest.mark.parametrize("n_days,seed", [(10, 1), (BOOTSTRAP_ROWS, 2), (504, 3)])
+def test_engine_matches_add_features(n_days, seed):
+    df = make_price_frame(n_days, seed=seed)
+    engine = IncrementalFeatureEngine()
+    actual = np.array(
+        [[row[name] for name in ENGINEERED_FEATURES] for row in map(engine.update, df.to_dict("records"))]
+    )
+    
+    expected = expected_features(df)
+    assert_features_match(expected, actual)
+    
+    # The warm-up rows are NaN in both, every later row is complete
+    assert np.isnan(actual[:FEATURE_WARMUP_ROWS]).any(axis=1).all()
+    assert not np.isnan(actual[FEATURE_WARMUP_ROWS:]).any()
+
+@pytest.mark.parametrize("history_rows,new_rows", [
+    (0, 60),                      # no history: every row computed from scratch
+    (1, 5),                       # bootstrap from a single bar
+    (20, 40),                     # history and new bars inside the warm-up
+    (BOOTSTRAP_ROWS - 1, 3),      # one bar short of a full rolling state
+    (BOOTSTRAP_ROWS, 3),          # exactly the bars from_history uses
+    (400, 1),                     # long history, one appended bar
+    (400, 25)                     # long history, several appended bars
+])
+def test_extend_features_matches_add_features(history_rows, new_rows):
+    df = make_price_frame(history_rows + new_rows, seed=history_rows + new_rows)
+    history = df.iloc[:history_rows]
+    new_bars = df.iloc[history_rows:]
+    
+    extended = extend_features(history, new_bars)
+    
+    assert list(extended.index) == list(new_bars.index)
+    expected = expected_features(df)[history_rows:]
+    assert_features_match(expected, extended[ENGINEERED_FEATURES].to_numpy(dtype=float))
+
+def test_zero_volume_bar():
+    df = make_price_frame(80, seed=7)
+    df.loc[60, "volume"] = 0
+    
+    extended = extend_features(df.iloc[:55], df.iloc[55:])
+    
+    expected = expected_features(df)[55:]
+    assert_features_match(expected, extended[ENGINEERED_FEATURES].to_numpy(dtype=float))
+
+@pytest.mark.parametrize("appended", [0, 1, 5])
+def test_append_bars_matches_add_features(appended):
+    pytest.importorskip("psycopg2")
+    from data.feature_store import append_bars
+    
+    # A kept frame whose last bar is rewritten and followed by new bars
+    df = make_price_frame(300 + appended, seed=11)
+    known = add_features(df.iloc[:300])
+    rewritten = df.iloc[299:].copy()
+    rewritten.loc[299, "close_price"] *= 1.01
+    df.loc[299, "close_price"] = rewritten.loc[299, "close_price"]
+    engine = IncrementalFeatureEngine.from_history(known.iloc[:-1])
+    
+    extended, computed, before_last = append_bars(known, engine, rewritten.reset_index(drop=True))
+    
+    expected = expected_features(df)
+    assert len(extended) == len(df)
+    assert len(computed) == appended + 1
+    assert_features_match(expected, extended[ENGINEERED_FEATURES].to_numpy(dtype=float))
+    
+    # The returned state continues the extended frame
+    again, _, _ = append_bars(extended, before_last, df.iloc[-1:].reset_index(drop=True))
+    assert_features_match(expected, again[ENGINEERED_FEATURES].to_numpy(dtype=float))
@@ -0,0 +1,67 @@
+# test_market_data.py
+"""
+External price history read through LocalFileProvider, installed as the
+process-wide provider with set_market_data_provider, so no network is needed.
+"""
+import sqlite3
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("psycopg2")
+pytest.importorskip("yfinance")
+
+import data.market_data as market_data
+from benchmarks.synthetic import make_history, write_market_data_dir
+from data.market_data import CachedProvider, LocalFileProvider, set_market_data_provider
+from data.stock_data import get_external_stock_data
+
+SYMBOL = "TEST"
+N_DAYS = 504
+
+@pytest.fixture
+def market_dir(tmp_path):
+    directory = str(tmp_path / "market")
+    write_market_data_dir(directory, [SYMBOL], n_days=N_DAYS)
+    return directory
+
+@pytest.fixture
+def local_provider(market_dir):
+    previous = market_data._provider
+    provider = LocalFileProvider(market_dir)
+    set_market_data_provider(provider)
+    yield provider
+    set_market_data_provider(previous)
+
+def test_external_stock_data_from_local_files(local_provider):
+    df = get_external_stock_data(SYMBOL, "1m")
+    
+    # One month back from the last bar in the file, renamed to stock_prices columns
+    history = make_history(N_DAYS, seed=0)
+    expected = history[history["Date"] > history["Date"].iloc[-1] - pd.DateOffset(months=1)]
+    assert len(df) == len(expected)
+    assert list(df["date"]) == list(expected["Date"])
+    assert df["close_price"].tolist() == pytest.approx(expected["Close"].tolist())
+    assert (df["adjusted_close"] == df["close_price"]).all()
+    assert (df["symbol"] == SYMBOL).all()
+    for column in ["open_price", "high_price", "low_price", "volume"]:
+        assert column in df.columns
+
+def test_external_stock_data_unknown_symbol(local_provider):
+    assert get_external_stock_data("MISSING", "1m") is None
+
+def test_cached_provider_skips_fresh_fetches(market_dir, tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    provider = CachedProvider(LocalFileProvider(market_dir), path, ttl=3600)
+    
+    def cached_rows():
+        with sqlite3.connect(path) as conn:
+            return conn.execute("SELECT COUNT(*) FROM market_data_cache").fetchone()[0]
+    
+    fresh = provider.history(SYMBOL, period="3mo", fresh=True)
+    assert cached_rows() == 0
+    
+    cached = provider.history(SYMBOL, period="3mo")
+    assert cached_rows() == 1
+    pd.testing.assert_frame_equal(cached, fresh)
+    pd.testing.assert_frame_equal(provider.history(SYMBOL, period="3mo"), fresh)
@@ -0,0 +1,196 @@
+# utils/cache.py
+"""
+Thread-safe in-process LRU cache with optional TTL and size bound
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+class LRUCache:
+    """
+    Least-recently-used cache bounded by entry count and (optionally) bytes
+    
+    get_or_compute coalesces concurrent misses on the same key, so only one
+    caller computes the value while the others wait for it. Values for which
+    the compute function returns None are not cached, and neither are values
+    whose key was invalidated while they were being computed (they may have
+    been read before the write that triggered the invalidation). Values
+    loaded outside get_or_compute (e.g. several keys with one query) are
+    stored with put_if_current, which applies the same rule.
+    """
+    
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: Optional[int] = None,
+        ttl: Optional[float] = None,
+        sizeof: Optional[Callable[[Any], int]] = None
+    ):
+        """
+        Args:
+            max_entries: Maximum number of cached values
+            max_bytes: Maximum total size as measured by sizeof (None for no bound)
+            ttl: Seconds after which a value expires (None for no expiry)
+            sizeof: Function returning the size of a value in bytes
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._sizeof = sizeof or (lambda value: 0)
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, size, stored_at)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        # key -> generation, bumped by invalidate while the key is computed
+        self._inflight: Dict[Hashable, int] = {}
+        self._inflight_events: Dict[Hashable, threading.Event] = {}
+        self._generation = 0  # bumped by every invalidate call
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Get a cached value, or None if missing or expired
+        """
+        with self._lock:
+            return self._get_locked(key)
+    
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Store a value, evicting least recently used entries as needed
+        """
+        size = self._sizeof(value)
+        with self._lock:
+            self._put_locked(key, value, size)
+    
+    def generation(self) -> int:
+        """
+        Get the invalidation generation, to be taken before loading a value
+        that is later stored with put_if_current
+        """
+        with self._lock:
+            return self._generation
+    
+    def put_if_current(self, key: Hashable, value: Any, generation: int) -> bool:
+        """
+        Store a value unless the cache was invalidated since generation()
+        returned generation
+        
+        Any invalidation counts, not only one matching key, so a value is
+        occasionally not stored when it could have been; it is then loaded
+        again on the next miss.
+        
+        Returns:
+            bool: True if the value was stored
+        """
+        size = self._sizeof(value)
+        with self._lock:
+            if self._generation != generation:
+                return False
+            self._put_locked(key, value, size)
+            return True
+    
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """
+        Get a cached value or compute, cache and return it
+        
+        Args:
+            key: Cache key
+            compute: Zero-argument function producing the value
+        
+        Returns:
+            Cached or freshly computed value (None if compute returned None)
+        """
+        while True:
+            with self._lock:
+                value = self._get_locked(key)
+                if value is not None:
+                    return value
+                event = self._inflight_events.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._inflight_events[key] = event
+                    self._inflight[key] = 0
+                    break
+            # Another thread is computing this key; wait and re-check
+            event.wait()
+        
+        try:
+            value = compute()
+            if value is not None:
+                size = self._sizeof(value)
+                with self._lock:
+                    if self._inflight.get(key) == 0:
+                        self._put_locked(key, value, size)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._inflight_events.pop(key, None)
+            event.set()
+    
+    def invalidate(self, predicate: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """
+        Drop entries whose key matches predicate (all entries if None)
+        
+        Returns:
+            Number of entries dropped
+        """
+        with self._lock:
+            self._generation += 1
+            # Values being computed right now must not be stored afterwards
+            for key in self._inflight:
+                if predicate is None or predicate(key):
+                    self._inflight[key] += 1
+            
+            keys = [key for key in self._entries if predicate is None or predicate(key)]
+            for key in keys:
+                self._remove_locked(key)
+            self._stats["invalidations"] += len(keys)
+            return len(keys)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get hit/miss/eviction counters and current size
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+    
+    def _get_locked(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats["misses"] += 1
+            return None
+        
+        value, size, stored_at = entry
+        if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+            self._remove_locked(key)
+            self._stats["misses"] += 1
+            return None
+        
+        self._entries.move_to_end(key)
+        self._stats["hits"] += 1
+        return value
+    
+    def _put_locked(self, key: Hashable, value: Any, size: int) -> None:
+        if key in self._entries:
+            self._remove_locked(key)
+        
+        self._entries[key] = (value, size, time.monotonic())
+        self._bytes += size
+        
+        while self._entries and (
+            len(self._entries) > self.max_entries
+            or (self.max_bytes is not None and self._bytes > self.max_bytes and len(self._entries) > 1)
+        ):
+            oldest = next(iter(self._entries))
+            self._remove_locked(oldest)
+            self._stats["evictions"] += 1
+    
+    def _remove_locked(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
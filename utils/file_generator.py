@@ -253,7 +253,6 @@ def create_template_files():
                             <div class="mb-3">
                                 <label for="days" class="form-label">Simulation Period (Days)</label>
                                 <select id="days" name="days" class="form-select">
-                                    <option value="30">30 Days</option>
                                     <option value="60">60 Days</option>
                                     <option value="90" selected>90 Days</option>
                                     <option value="180">180 Days</option>
@@ -502,10 +501,12 @@ def create_template_files():
                                 <ul>
                                     <li><code>symbol</code> (path) - Stock symbol (e.g., AAPL)</li>
                                     <li><code>period</code> (query, optional) - Time period (default: "3m", options: "1m", "3m", "6m", "1y")</li>
+                                    <li><code>format</code> (query, optional) - Response layout (default: "rows", options: "rows", "columnar", "arrow"). "columnar" returns one array per field; "arrow" returns an Arrow IPC stream and can also be requested with <code>Accept: application/vnd.apache.arrow.stream</code></li>
                                 </ul>
                                 
                                 <h6>Example:</h6>
                                 <pre><code>GET /api/stock/AAPL?period=3m</code></pre>
+                                <pre><code>GET /api/stock/AAPL?period=1y&amp;format=columnar</code></pre>
                             </div>
                         </div>
                         
@@ -526,6 +527,23 @@ def create_template_files():
                             </div>
                         </div>
                         
+                        <div class="card mb-4">
+                            <div class="card-header">
+                                <h5 class="mb-0">GET /api/predict</h5>
+                            </div>
+                            <div class="card-body">
+                                <p>Get AI predictions for several stocks in one call. Predictions are returned per symbol; symbols that could not be predicted are listed under <code>errors</code>.</p>
+                                
+                                <h6>Parameters:</h6>
+                                <ul>
+                                    <li><code>symbols</code> (query, repeatable) - Stock symbols (default: all available symbols)</li>
+                                </ul>
+                                
+                                <h6>Example:</h6>
+                                <pre><code>GET /api/predict?symbols=AAPL&amp;symbols=MSFT</code></pre>
+                            </div>
+                        </div>
+                        
                         <div class="card mb-4">
                             <div class="card-header">
                                 <h5 class="mb-0">GET /api/portfolio/simulate</h5>
@@ -536,7 +554,7 @@ def create_template_files():
                                 <h6>Parameters:</h6>
                                 <ul>
                                     <li><code>symbol</code> (query) - Stock symbol (e.g., AAPL)</li>
-                                    <li><code>days</code> (query, optional) - Simulation period in days (default: 90)</li>
+                                    <li><code>days</code> (query, optional) - Simulation period in days, 50-365 (default: 90)</li>
                                     <li><code>initial_balance</code> (query, optional) - Starting portfolio balance (default: 10000)</li>
                                 </ul>
                                 
@@ -544,6 +562,57 @@ def create_template_files():
                                 <pre><code>GET /api/portfolio/simulate?symbol=TSLA&days=60&initial_balance=15000</code></pre>
                             </div>
                         </div>
+                        
+                        <div class="card mb-4">
+                            <div class="card-header">
+                                <h5 class="mb-0">GET /api/portfolio/simulate-multi</h5>
+                            </div>
+                            <div class="card-body">
+                                <p>Run a portfolio simulation across several stocks. The initial balance is split equally between the symbols; the response holds the combined result and one result per symbol.</p>
+                                
+                                <h6>Parameters:</h6>
+                                <ul>
+                                    <li><code>symbols</code> (query, repeatable) - Stock symbols (default: all available symbols)</li>
+                                    <li><code>days</code> (query, optional) - Simulation period in days, 50-365 (default: 90)</li>
+                                    <li><code>initial_balance</code> (query, optional) - Starting portfolio balance (default: 10000)</li>
+                                </ul>
+                                
+                                <h6>Example:</h6>
+                                <pre><code>GET /api/portfolio/simulate-multi?symbols=AAPL&amp;symbols=MSFT&amp;days=120</code></pre>
+                            </div>
+                        </div>
+                        
+                        <div class="card mb-4">
+                            <div class="card-header">
+                                <h5 class="mb-0">GET /api/portfolio/sweep</h5>
+                            </div>
+                            <div class="card-body">
+                                <p>Run a portfolio simulation for every combination of the given parameters. Results are streamed as newline-delimited JSON, one line per grid cell ordered by days and confidence threshold; cells that could not be simulated are reported as lines with an <code>error</code> field. The grid may hold at most 1000 cells.</p>
+                                
+                                <h6>Parameters:</h6>
+                                <ul>
+                                    <li><code>symbol</code> (query) - Stock symbol (e.g., AAPL)</li>
+                                    <li><code>days</code> (query, repeatable) - Simulation periods in days, 50-365 (default: 90)</li>
+                                    <li><code>initial_balance</code> (query, repeatable) - Starting portfolio balances (default: 10000)</li>
+                                    <li><code>confidence_threshold</code> (query, repeatable) - Minimum prediction confidences to trade on, 0.5-1 (default: 0.5)</li>
+                                </ul>
+                                
+                                <h6>Example:</h6>
+                                <pre><code>GET /api/portfolio/sweep?symbol=AAPL&amp;days=60&amp;days=180&amp;confidence_threshold=0.5&amp;confidence_threshold=0.6</code></pre>
+                            </div>
+                        </div>
+                        
+                        <div class="card mb-4">
+                            <div class="card-header">
+                                <h5 class="mb-0">GET /api/metrics</h5>
+                            </div>
+                            <div class="card-body">
+                                <p>Get runtime counters of the serving process: database pool checkouts and waits, hit/miss counts of the price, feature and prediction caches, and the prediction writer's queue depth and flush latency.</p>
+                                
+                                <h6>Example:</h6>
+                                <pre><code>GET /api/metrics</code></pre>
+                            </div>
+                        </div>
                     </div>
                 </div>
             </div>
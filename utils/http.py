@@ -0,0 +1,106 @@
+# utils/http.py
+"""
+HTTP response helpers shared by the API routes
+"""
+import gzip
+import hashlib
+from typing import Any, Dict
+from fastapi import Request, Response
+
+from config import RESPONSE_COMPRESSION_MIN_SIZE
+
+try:
+    import brotli
+except ImportError:  # optional, gzip is used when brotli is unavailable
+    brotli = None
+
+def _accepted_encodings(request: Request) -> set:
+    header = request.headers.get("accept-encoding", "")
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        if name and params.replace(" ", "") not in ("q=0", "q=0.0"):
+            encodings.add(name.lower())
+    return encodings
+
+def compressed_response(
+    request: Request, 
+    body: bytes, 
+    media_type: str, 
+    vary: str = "",
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Build a response, compressing large bodies if the client accepts it
+    
+    Brotli is preferred when the brotli package is installed, then gzip.
+    Bodies smaller than RESPONSE_COMPRESSION_MIN_SIZE are sent as is.
+    
+    Args:
+        request: Incoming request (for Accept-Encoding)
+        body: Encoded response body
+        media_type: Content type of the body
+        vary: Extra request headers the body depends on
+        headers: Additional response headers
+        
+    Returns:
+        Response object
+    """
+    headers = dict(headers or {})
+    headers["Vary"] = ", ".join(filter(None, [vary, "Accept-Encoding"]))
+    
+    if len(body) >= RESPONSE_COMPRESSION_MIN_SIZE:
+        encodings = _accepted_encodings(request)
+        if brotli is not None and "br" in encodings:
+            body = brotli.compress(body, quality=5)
+            headers["Content-Encoding"] = "br"
+        elif "gzip" in encodings:
+            body = gzip.compress(body, compresslevel=6)
+            headers["Content-Encoding"] = "gzip"
+    
+    return Response(content=body, media_type=media_type, headers=headers)
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a weak ETag from the values a representation depends on
+    """
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+def cache_headers(etag: str, max_age: int = 0) -> Dict[str, str]:
+    """
+    Build validator and Cache-Control headers
+    
+    Only an ETag is sent: the stored dates (market dates, local prediction
+    times) do not record when the data was last written, so a Last-Modified
+    derived from them could validate changed data.
+    
+    Args:
+        etag: ETag for the representation
+        max_age: Seconds clients may reuse the response without revalidating
+            (0 means always revalidate)
+    
+    Returns:
+        Dictionary of response headers
+    """
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}, must-revalidate" if max_age > 0 else "no-cache"
+    }
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    """
+    Evaluate If-None-Match against the current ETag
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    candidates = {tag.strip() for tag in if_none_match.split(",")}
+    # Weak comparison: W/"x" matches "x"
+    return "*" in candidates or etag in candidates or etag[2:] in candidates
+
+def not_modified_response(headers: Dict[str, str]) -> Response:
+    """
+    Build a 304 response carrying the current validators
+    """
+    return Response(status_code=304, headers=headers)